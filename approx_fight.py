@@ -0,0 +1,235 @@
+import itertools
+import threading
+from collections import OrderedDict
+import numpy as np
+from person.BasePerson import BasePerson as Person
+from stats import Stats
+from vector_fight import VectorFight, PERSON1_WON, PERSON2_WON, PERSON1_RAN, PERSON2_RAN
+
+"""
+The approximate fight samples the outcome of each fight instead of running every turn (the 'approx' engine)
+
+The same matchups come up all the time (there are only a few species, and the stats are chosen from a small range),
+so the outcomes of each matchup are simulated once (with the vector fight) and kept in a table:
+    - the key is both sides' effective speed, damage and protection, motivation penalty,
+      and their health and motivation (rounded to a bucket)
+    - each entry is the outcome of many simulated fights (who won, the turns, and the health and motivation left)
+    - the table only keeps the most recently used entries (the least recently used are taken out when it is full)
+    - the matchups that aren't in the table are all simulated at once (in one vector fight)
+    - each line (in each thread) has its own table, so a seeded line gets the same outcomes when it is run from the start
+      (a resumed line starts with an empty table, so it can be a bit different)
+
+A fight then takes a random outcome of its matchup, and the health and motivation left are moved
+by how far the fighters were from the middle of their buckets
+"""
+
+# the size of the health and motivation buckets
+HEALTH_BUCKET = 25
+MOTIVATION_BUCKET = 25
+
+
+class OutcomeDistribution():
+    """
+    The outcomes of many simulated fights of one matchup (each column has one value for each fight)
+    """
+
+    def __init__(self, results: np.ndarray, turns: np.ndarray, health: np.ndarray, motivation: np.ndarray):
+        self.results = results
+        self.turns = turns
+
+        self.health = health
+        """ The health left of each side (a row for each side) """
+
+        self.motivation = motivation
+        """ The motivation left of each side (a row for each side) """
+
+    def __len__(self):
+        return len(self.results)
+
+    def win_probability(self, side: int = 0) -> float:
+        """
+        Gets the chance of a side killing the other one
+        """
+
+        return float(np.mean(self.results == (PERSON1_WON if side == 0 else PERSON2_WON)))
+
+    def run_probability(self, side: int = 0) -> float:
+        """
+        Gets the chance of a side running away
+        """
+
+        return float(np.mean(self.results == (PERSON1_RAN if side == 0 else PERSON2_RAN)))
+
+    def expected_turns(self) -> float:
+        return float(np.mean(self.turns))
+
+    def remaining_health(self, side: int = 0) -> np.ndarray:
+        """
+        Gets the health left of a side in each fight it won (or ran away from)
+        """
+
+        return self.health[side][self.health[side] > 0]
+
+
+class OutcomeTable():
+    """
+    The outcome distributions of the matchups (simulated when they are first needed, and kept until they are the least recently used)
+    """
+
+    def __init__(self, max_size: int = 8192, samples: int = 64, seed: int = 0):
+        self.max_size = max_size
+        """ The most matchups that are kept """
+
+        self.samples = samples
+        """ The fights simulated for each matchup """
+
+        self.seed = seed
+        """ The seed of the simulations (the same matchups missing from the table always get the same outcomes) """
+
+        self.entries: OrderedDict[tuple, OutcomeDistribution] = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key: tuple) -> OutcomeDistribution:
+        """
+        Gets the outcomes of a matchup (simulating them if they are not in the table)
+        """
+
+        return self.get_many([key])[0]
+
+    def get_many(self, keys: list[tuple]) -> list[OutcomeDistribution]:
+        """
+        Gets the outcomes of the matchups (the ones that are not in the table are simulated together)
+        """
+
+        found = {}
+        for key in keys:
+            if key in found:
+                continue
+
+            distribution = self.entries.get(key)
+            if distribution is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+            found[key] = distribution
+
+        missing = [key for key, distribution in found.items() if distribution is None]
+        if missing:
+            self.misses += len(missing)
+            found.update(zip(missing, self.simulate(missing)))
+
+            for key in missing:
+                self.entries[key] = found[key]
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+        return [found[key] for key in keys]
+
+    def simulate(self, keys: list[tuple]) -> list[OutcomeDistribution]:
+        """
+        Simulates the fights of the matchups (from the middle of their buckets)
+        """
+
+        # (side, column, fight) with the samples of each matchup next to each other
+        columns = np.repeat(np.array(keys, dtype=float).reshape(len(keys), 2, 6).transpose(1, 2, 0), self.samples, axis=2)
+        speed, damage, protection, motivation_penalty, health, motivation = columns.transpose(1, 0, 2)
+
+        rng = np.random.default_rng([self.seed, *itertools.chain.from_iterable(keys)])
+        fight = VectorFight.from_columns(health, motivation, motivation_penalty / 100, speed, damage, protection, rng)
+        fight.simulate()
+
+        # keep the outcomes small (there can be a lot of them)
+        results = fight.results.astype(np.int8).reshape(len(keys), self.samples)
+        turns = fight.turns.astype(np.int16).reshape(len(keys), self.samples)
+        health = fight.health.astype(np.float32).reshape(2, len(keys), self.samples)
+        motivation = fight.motivation.astype(np.float32).reshape(2, len(keys), self.samples)
+
+        return [OutcomeDistribution(results[i], turns[i], health[:, i], motivation[:, i]) for i in range(len(keys))]
+
+
+def bucket(values: np.ndarray, size: int) -> np.ndarray:
+    """
+    Rounds the values to the middle of their bucket (never 0, so the health can be scaled from it)
+    """
+
+    return np.maximum(np.round(values / size), 1).astype(int) * size
+
+
+# the tables used when a fight isn't given one (for each line, in each thread)
+default_tables = threading.local()
+
+
+def get_default_table(game: int = 0) -> OutcomeTable:
+    """
+    Gets the table of a line in this thread (made when it is first needed)
+    """
+
+    if not hasattr(default_tables, 'tables'):
+        default_tables.tables = {}
+
+    table = default_tables.tables.get(game)
+    if table is None:
+        table = default_tables.tables[game] = OutcomeTable()
+
+    return table
+
+
+def clear_default_tables():
+    """
+    Forgets the tables of this thread (eg. before running a different line with the same id)
+    """
+
+    default_tables.tables = {}
+
+
+class ApproxFight(VectorFight):
+    """
+    The approximate fight class takes the outcome of each fight from the outcome table (instead of running the turns)
+    """
+
+    def __init__(self, stats: Stats, matches: list[tuple[Person, Person]], game_data: dict[{'game': int, 'iteration': int, 'day': int}], fight_nums: list[int] = None, rng: np.random.Generator = None, table: OutcomeTable = None):
+        super().__init__(stats, matches, game_data, fight_nums, rng)
+
+        self.table = table if table is not None else get_default_table(game_data['game'])
+
+    def get_keys(self) -> list[tuple]:
+        """
+        Gets the matchup of each fight (see `OutcomeTable`)
+        """
+
+        self.health_bucket = bucket(self.health, HEALTH_BUCKET)
+        self.motivation_bucket = bucket(self.motivation, MOTIVATION_BUCKET)
+        motivation_penalty = np.round(self.motivation_penalty * 100).astype(int)
+
+        # (fights, side, column)
+        keys = np.stack([self.speed, self.damage, self.protection, motivation_penalty, self.health_bucket, self.motivation_bucket], axis=2).transpose(1, 0, 2)
+        return [tuple(key) for key in keys.reshape(len(self.results), 12).tolist()]
+
+    def simulate(self):
+        """
+        Takes a random outcome for each fight (from the outcomes of its matchup)
+        """
+
+        if len(self.results) == 0:
+            return self.results
+
+        keys = self.get_keys()
+        picks = self.rng.integers(0, self.table.samples, len(keys))
+
+        health = np.empty_like(self.health)
+        motivation = np.empty_like(self.motivation)
+        for i, (distribution, pick) in enumerate(zip(self.table.get_many(keys), picks)):
+            self.results[i] = distribution.results[pick]
+            self.turns[i] = distribution.turns[pick]
+            health[:, i] = distribution.health[:, pick]
+            motivation[:, i] = distribution.motivation[:, pick]
+
+        # move the outcome by how far the fighters were from the middle of their buckets
+        self.health[:] = np.minimum(health * self.health / self.health_bucket, 150)
+        self.motivation[:] = np.clip(motivation + self.motivation - self.motivation_bucket, 0, 100)
+
+        return self.results
@@ -0,0 +1,294 @@
+import argparse
+import concurrent.futures
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import tempfile
+import time
+from day import Day
+from fight import Fight
+from game import Game, game_runner, run_process_pool
+from stats import Stats
+from vector_fight import VectorFight
+from approx_fight import ApproxFight, OutcomeTable
+from person.population import Population
+from random_person import get_random_person
+from rng import make_rng, make_numpy_rng
+
+"""
+Benchmarks for the parts of the simulation that run the most
+
+Each benchmark is run with a fixed seed, so the results can be compared between versions:
+    - fights: fights per second for Fight.run (VectorFight for the numpy engine, and ApproxFight with an empty table for the approx engine)
+    - days: days per second for Day.run at different roster sizes
+    - games: games per second for Game.main (the fast engine runs the whole game at once, see fast_game.py)
+    - runner: iterations per second for game_runner with 1..N parallel lines
+
+The results can be saved as json (with the version they were run on) to track changes between versions
+"""
+
+SEED = 0
+
+
+def timed(function, repeats: int = 3) -> float:
+    """
+    Gets the fastest time (in seconds) of running the function
+    """
+
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        taken = time.perf_counter() - start
+
+        best = taken if best is None else min(best, taken)
+
+    return best
+
+
+def make_population(players: int, rng: random.Random) -> Population:
+    """
+    Makes a population of random people
+    """
+
+    population = Population(players)
+    for i in range(players):
+        get_random_person(None, None, person_num=i+1, population=population, rng=rng)
+
+    return population
+
+
+def make_day(players: int, rng: random.Random = random, engine='python') -> Day:
+    """
+    Makes a day (with random people and day choices) to benchmark
+    """
+
+    population = make_population(players, rng)
+
+    day = Day(Stats(1), population.people(), game_data={'game': 0, 'iteration': 1, 'day': 1}, engine=engine, rng=rng)
+    for person in day.people:
+        person.set_day_choice(1, day.get_choice(person))
+
+    return day
+
+
+def benchmark_make_matches(sizes: list[int] = [1_000, 10_000, 100_000], repeats: int = 5) -> list[dict]:
+    """
+    Times Day.make_matches for each roster size (the time per player should stay the same if it is linear)
+    """
+
+    results = []
+    for players in sizes:
+        rng = make_rng(SEED, 'make_matches', players)
+        best = None
+        for _ in range(repeats):
+            day = make_day(players, rng)
+
+            start = time.perf_counter()
+            day.make_matches()
+            taken = time.perf_counter() - start
+
+            best = taken if best is None else min(best, taken)
+
+        results.append({
+            'benchmark': 'make_matches',
+            'players': players,
+            'seconds': best,
+            'microseconds_per_player': best / players * 1_000_000,
+        })
+
+    return results
+
+
+def benchmark_fights(fights: int = 5_000, engines: list[str] = ['python', 'numpy', 'approx']) -> list[dict]:
+    """
+    Times running fights between random people (one Fight at a time, or all at once with the vector fight)
+    """
+
+    results = []
+    for engine in engines:
+        def run():
+            rng = make_rng(SEED, 'fights')
+            population = make_population(fights * 2, rng)
+            people = population.people()
+            matches = list(zip(people[0::2], people[1::2]))
+            game_data = {'game': 0, 'iteration': 1, 'day': 1}
+
+            start = time.perf_counter()
+            if engine == 'numpy':
+                VectorFight(Stats(1), matches, game_data, rng=make_numpy_rng(rng)).run()
+            elif engine == 'approx':
+                ApproxFight(Stats(1), matches, game_data, rng=make_numpy_rng(rng), table=OutcomeTable()).run()
+            else:
+                for fight_num, (person1, person2) in enumerate(matches):
+                    Fight(Stats(1), person1, person2, {**game_data, 'fight_num': fight_num}, rng=rng).run()
+            return time.perf_counter() - start
+
+        seconds = min(run() for _ in range(3))
+        results.append({
+            'benchmark': 'fights',
+            'engine': engine,
+            'fights': fights,
+            'seconds': seconds,
+            'fights_per_second': fights / seconds,
+        })
+
+    return results
+
+
+def benchmark_days(sizes: list[int] = [100, 1_000, 10_000], engines: list[str] = ['python', 'numpy']) -> list[dict]:
+    """
+    Times the first day of a game (the busiest one) at each roster size
+    """
+
+    results = []
+    for engine in engines:
+        for players in sizes:
+            def run():
+                day = make_day(players, make_rng(SEED, 'days', players), engine)
+
+                start = time.perf_counter()
+                day.run()
+                return time.perf_counter() - start
+
+            seconds = min(run() for _ in range(3))
+            results.append({
+                'benchmark': 'days',
+                'engine': engine,
+                'players': players,
+                'seconds': seconds,
+                'days_per_second': 1 / seconds,
+            })
+
+    return results
+
+
+def benchmark_games(sizes: list[int] = [100, 1_000], engines: list[str] = ['python', 'numpy', 'fast'], games: int = 3) -> list[dict]:
+    """
+    Times whole games (making the players and running Game.main)
+    """
+
+    results = []
+    for engine in engines:
+        for players in sizes:
+            def run():
+                rng = make_rng(SEED, 'games', players)
+                for _ in range(games):
+                    Game(0, 1, Stats(1), 0, players, engine, rng).main()
+
+            seconds = timed(run)
+            results.append({
+                'benchmark': 'games',
+                'engine': engine,
+                'players': players,
+                'seconds': seconds,
+                'games_per_second': games / seconds,
+            })
+
+    return results
+
+
+def benchmark_runner(lines: list[int] = [1, 2, 4], players: int = 500, iterations: int = 3, backends: list[str] = ['thread', 'process'], engine='numpy') -> list[dict]:
+    """
+    Times game_runner with a number of parallel lines (on each backend)
+    """
+
+    results = []
+    for backend in backends:
+        for parallel_games in lines:
+            with tempfile.TemporaryDirectory() as folder:
+                stats = Stats(parallel_games)
+                stats.open_writer(os.path.join(folder, 'average_stats.csv'), os.path.join(folder, 'best_stats.csv'))
+
+                start = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    if backend == 'process':
+                        run_process_pool(iterations, parallel_games, stats, players, engine=engine, seed=SEED)
+                    else:
+                        with concurrent.futures.ThreadPoolExecutor(parallel_games) as executor:
+                            futures = [executor.submit(game_runner, iterations, parallel_id, stats, players, engine=engine, rng=make_rng(SEED, parallel_id)) for parallel_id in range(parallel_games)]
+                            for future in futures:
+                                future.result()
+                seconds = time.perf_counter() - start
+
+                stats.close()
+
+            results.append({
+                'benchmark': 'runner',
+                'backend': backend,
+                'engine': engine,
+                'parallel_games': parallel_games,
+                'players': players,
+                'iterations': iterations,
+                'seconds': seconds,
+                'iterations_per_second': parallel_games * iterations / seconds,
+            })
+
+    return results
+
+
+def get_version() -> str | None:
+    """
+    Gets the git commit the benchmarks are run on (if it is a git repo)
+    """
+
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_result(result: dict):
+    # show the settings, then the speed
+    settings = ' '.join(f'{k}={v}' for k, v in result.items() if k not in ['benchmark', 'seconds'] and not k.endswith('_per_second') and not k.startswith('microseconds'))
+    speed = ' '.join(f'{k}={v:,.2f}' for k, v in result.items() if k.endswith('_per_second') or k.startswith('microseconds'))
+    print(f"{result['benchmark']:<13} {settings:<60} {result['seconds'] * 1000:10.2f}ms  {speed}")
+
+
+benchmarks = {
+    'make_matches': benchmark_make_matches,
+    'fights': benchmark_fights,
+    'days': benchmark_days,
+    'games': benchmark_games,
+    'runner': benchmark_runner,
+}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmarks the simulation (with fixed seeds)')
+    parser.add_argument('benchmarks', nargs='*', metavar='benchmark', help=f"the benchmarks to run ({', '.join(benchmarks)}) - all by default")
+    parser.add_argument('--lines', type=int, default=os.cpu_count(), help='the most parallel lines for the runner benchmark')
+    parser.add_argument('--output', help='save the results to this json file')
+    args = parser.parse_args()
+
+    for name in args.benchmarks:
+        if name not in benchmarks:
+            parser.error(f'unknown benchmark: {name}')
+
+    results = []
+    for name in args.benchmarks or benchmarks:
+        if name == 'runner':
+            lines = sorted({1, *[2 ** i for i in range(1, args.lines.bit_length()) if 2 ** i <= args.lines], args.lines})
+            name_results = benchmark_runner(lines)
+        else:
+            name_results = benchmarks[name]()
+
+        for result in name_results:
+            print_result(result)
+        results.extend(name_results)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'version': get_version(),
+                'python': platform.python_version(),
+                'machine': platform.machine(),
+                'cpus': os.cpu_count(),
+                'time': time.time(),
+                'seed': SEED,
+                'results': results,
+            }, f, indent=4)
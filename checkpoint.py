@@ -0,0 +1,148 @@
+import csv
+import json
+import os
+import random
+import numpy as np
+from columnar import load_columns
+from stats_writer import headings
+
+"""
+Checkpoints let a long run be resumed (after a crash or Ctrl-C) from the last checkpointed iteration of each line
+
+Each line has its own file (data/checkpoints/line_<parallel_id>.json):
+    {
+        'parallel_id': 0,
+        'iteration': 20,                # the last iteration that is done (and saved in the results)
+        'iterations': 100,              # the iterations the line will run
+        'stat_closeness': 80,           # the stat_closeness of the iteration (from the run's schedule, None if it is adaptive)
+        'best_data': {...},             # the last best_data entry (to make the next generation)
+        'average_data': {...},
+        'top_data': [{...}, ...],       # the best entries of the last iteration (if the strategy tracks more than the best)
+        'line_best': [iteration, {...}],  # the best entry of the whole line so far
+        'random_state': [...],          # the state of the line's generator (the numpy ones are made from it)
+    }
+"""
+
+CHECKPOINT_LOCATION = './data/checkpoints'
+
+
+def make_checkpoint(parallel_id: int, iteration: int, iterations: int, stats, line_best: tuple[int, dict] | None, rng: random.Random = random, stat_closeness: int | None = None) -> dict:
+    """
+    Makes the checkpoint of a line (after an iteration is done)
+    """
+
+    return {
+        'parallel_id': parallel_id,
+        'iteration': iteration,
+        'iterations': iterations,
+        'stat_closeness': stat_closeness,
+        'best_data': stats.best_data.get((parallel_id, iteration)),
+        'average_data': stats.average_data.get((parallel_id, iteration)),
+        'top_data': stats.top_data.get((parallel_id, iteration)),
+        'line_best': line_best,
+        'random_state': rng.getstate(),
+    }
+
+
+def save_checkpoint(checkpoint: dict, location=CHECKPOINT_LOCATION):
+    """
+    Saves the checkpoint of a line (written to a temporary file first, so a crash can't leave half a checkpoint)
+    """
+
+    if not os.path.exists(location):
+        os.makedirs(location)
+
+    path = os.path.join(location, f"line_{checkpoint['parallel_id']}.json")
+    with open(path + '.tmp', 'w') as f:
+        json.dump(checkpoint, f)
+
+    os.replace(path + '.tmp', path)
+
+
+def load_checkpoints(location=CHECKPOINT_LOCATION) -> dict[int, dict]:
+    """
+    Loads the checkpoints of all the lines
+    """
+
+    checkpoints = {}
+    if not os.path.exists(location):
+        return checkpoints
+
+    for name in os.listdir(location):
+        if name.startswith('line_') and name.endswith('.json'):
+            with open(os.path.join(location, name)) as f:
+                checkpoint = json.load(f)
+            checkpoints[checkpoint['parallel_id']] = checkpoint
+
+    return checkpoints
+
+
+def clear_checkpoints(location=CHECKPOINT_LOCATION):
+    """
+    Removes the checkpoints (for a new run)
+    """
+
+    if not os.path.exists(location):
+        return
+
+    for name in os.listdir(location):
+        if name.startswith('line_'):
+            os.remove(os.path.join(location, name))
+
+
+def restore_random_state(checkpoint: dict, rng: random.Random = random):
+    """
+    Puts the line's generator back to how it was at the checkpoint
+    """
+
+    # json turns the tuples into lists
+    version, state, gauss = checkpoint['random_state']
+    rng.setstate((version, tuple(state), gauss))
+
+
+def last_iteration(checkpoints: dict[int, dict], game: int) -> int:
+    """
+    Gets the last checkpointed iteration of a line (0 if it has none)
+    """
+
+    checkpoint = checkpoints.get(game)
+    return checkpoint['iteration'] if checkpoint else 0
+
+
+def trim_results(checkpoints: dict[int, dict], locations: list[str], formats=('csv',), lines: list[int] = None):
+    """
+    Removes the result rows that are after each line's checkpoint (they will be made again when resumed)
+
+    any csv file that starts with the game and iteration columns can be trimmed (eg. the fight logs), and its headings are kept
+    if lines are given, only their rows are trimmed (the other lines' rows are all kept)
+    """
+
+    def keep_row(game: int, iteration: int) -> bool:
+        return (lines is not None and game not in lines) or iteration <= last_iteration(checkpoints, game)
+
+    for location in locations:
+        if 'csv' in formats and os.path.exists(location):
+            with open(location, encoding='utf-8', newline='') as f:
+                rows = list(csv.reader(f))
+
+            file_headings, rows = (rows[0], rows[1:]) if rows else (headings, [])
+
+            # a row can be cut off if the run was stopped while writing it
+            rows = [row for row in rows if len(row) == len(file_headings) and keep_row(int(row[0]), int(row[1]))]
+
+            with open(location, 'w', encoding='utf-8', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(file_headings)
+                writer.writerows(rows)
+
+        columnar_location = os.path.splitext(location)[0]
+        if 'columnar' in formats and os.path.exists(columnar_location):
+            table = load_columns(columnar_location)
+            keep = np.array([keep_row(game, iteration) for game, iteration in zip(table['game'], table['iteration'])], dtype=bool)
+
+            columns = {name: np.array(table[name][keep]) for name in headings}
+            del table
+
+            for name in headings:
+                with open(os.path.join(columnar_location, f'{name}.bin'), 'wb') as f:
+                    f.write(columns[name].tobytes())
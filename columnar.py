@@ -0,0 +1,117 @@
+import json
+import os
+import numpy as np
+from person.registry import registry
+
+"""
+The columnar format stores a table (eg. best_stats) as a folder with a binary file for each column
+
+    best_stats/
+        header.json         - the columns (and their types) and the species names
+        game.bin            - the raw values of each column (one after the other)
+        iteration.bin
+        ...
+
+The columns can be loaded with numpy without parsing or copying (see `load_columns`), and new rows are
+just added to the end of each file. The specie is stored as its index in the header's species list
+(a new table starts with the species registry's names, so the index is the specie's id - see person/registry.py)
+"""
+
+# the columns (and their types) of the average and best stats
+columns = [
+    ('game', 'int32'),
+    ('iteration', 'int32'),
+    ('specie', 'uint8'),
+    ('speed', 'float64'),
+    ('damage', 'float64'),
+    ('protection', 'float64'),
+    ('winner_remaining_health', 'float64'),
+    ('turns', 'float64'),
+]
+
+
+class ColumnarWriter():
+    """
+    Adds rows (in the same order as the csv headings) to the end of a columnar table
+    """
+
+    def __init__(self, location: str, append=False):
+        self.location = location
+        self.header_location = os.path.join(location, 'header.json')
+
+        if not os.path.exists(location):
+            os.makedirs(location)
+
+        # keep the species that are already in the table (if adding to it)
+        self.species = list(registry.names)
+        if append and os.path.exists(self.header_location):
+            with open(self.header_location) as f:
+                self.species = json.load(f)['species']
+
+        self.specie_ids = {name: i for i, name in enumerate(self.species)}
+        """ The index of each specie in the header's species """
+
+        mode = 'ab' if append else 'wb'
+        self.files = {name: open(os.path.join(location, f'{name}.bin'), mode) for name, _ in columns}
+        self.save_header()
+
+    def save_header(self):
+        with open(self.header_location, 'w') as f:
+            json.dump({'columns': columns, 'species': self.species}, f)
+
+    def write(self, rows: list[list]):
+        """
+        Writes the rows to the end of each column
+        """
+
+        if len(rows) == 0:
+            return
+
+        # the species are stored as their index
+        new_specie = False
+        for row in rows:
+            if row[2] not in self.specie_ids:
+                self.specie_ids[row[2]] = len(self.species)
+                self.species.append(row[2])
+                new_specie = True
+
+        if new_specie:
+            self.save_header()
+
+        values = list(zip(*rows))
+        for i, (name, dtype) in enumerate(columns):
+            column = values[i]
+            if name == 'specie':
+                column = [self.specie_ids[specie] for specie in column]
+
+            self.files[name].write(np.array(column, dtype=dtype).tobytes())
+            self.files[name].flush()
+
+    def close(self):
+        for file in self.files.values():
+            file.close()
+
+
+def load_columns(location: str) -> dict[str, np.ndarray]:
+    """
+    Loads a columnar table (the columns are memory mapped, so they aren't read until used)
+
+    The specie column is the index of each specie, and the names are in the 'species' entry
+    """
+
+    with open(os.path.join(location, 'header.json')) as f:
+        header = json.load(f)
+
+    # only use the rows that every column has (in case a run stopped in the middle of a write)
+    sizes = [os.path.getsize(os.path.join(location, f'{name}.bin')) // np.dtype(dtype).itemsize for name, dtype in header['columns']]
+    rows = min(sizes)
+
+    table = {}
+    for name, dtype in header['columns']:
+        if rows == 0:
+            table[name] = np.empty(0, dtype=dtype)
+        else:
+            table[name] = np.memmap(os.path.join(location, f'{name}.bin'), dtype=dtype, mode='r', shape=(rows,))
+
+    table['species'] = np.array(header['species'])
+    return table
@@ -1,6 +1,12 @@
 import random
+import numpy as np
 from fight import Fight
+from vector_fight import VectorFight
+from approx_fight import ApproxFight
+from rng import make_numpy_rng
 from person.BasePerson import BasePerson as Person
+from person.population import RUN
+from instrumentation import Instruments
 import asyncio
 import concurrent.futures
 
@@ -18,7 +24,7 @@ The choices happen first, and then matches are made
 """
 
 class Day():
-    def __init__(self, stats: Stats, people: list[Person], game_data: dict[{'game': int, 'iteration': int, 'day': int}]):
+    def __init__(self, stats: Stats, people: list[Person], game_data: dict[{'game': int, 'iteration': int, 'day': int}], engine='python', rng: random.Random = random, instruments: Instruments = None):
         self.people = people
         """ The people that will fight today """
 
@@ -30,6 +36,16 @@ class Day():
 
         self.games = []
 
+        self.engine = engine
+        """ How the fights are run - 'python' (one Fight at a time), 'numpy' (all the ai fights at once) or 'approx' (the ai fights' outcomes are sampled)
+        the 'fast' engine runs the whole game at once (see fast_game.py), and only gets here when it can't, so it runs the days like 'numpy' """
+
+        self.rng = rng
+        """ The random number generator of the game (the random module by default) """
+
+        self.instruments = instruments
+        """ The instruments of the game's line (None when it isn't instrumented) """
+
     def run(self):
         """
         Runs the day
@@ -44,10 +60,21 @@ class Day():
             person.add_health(5)
 
         # Make the matches
+        if self.instruments:
+            start = self.instruments.now()
         self.make_matches()
+        if self.instruments:
+            self.instruments.add_time('make_matches', start)
 
         # Run the matches
+        if self.instruments:
+            start = self.instruments.now()
         self.run_matches()
+        if self.instruments:
+            self.instruments.add_time('fights', start)
+            self.instruments.count('days')
+            self.instruments.count('fights', len(self.matches))
+            self.instruments.count('turns', sum(int(np.sum(fight.turns)) for fight in self.games))
 
         # Return the matches
         return self.matches
@@ -60,7 +87,7 @@ class Day():
         choices = ['fight', 'run']
 
         if person.ai:
-            return random.choice(choices)
+            return self.rng.choice(choices)
         else:
             return input(f'What do you want to do? {choices}: ')
 
@@ -73,33 +100,17 @@ class Day():
         people = self.people.copy()
 
         # Shuffle the people
-        random.shuffle(people)
+        self.rng.shuffle(people)
 
         # Make the matches
-        # Go through each people and match them with the next person
-        # But have a chance of a person not fighting
-        while len(people) > 0:
-            person = people.pop(0)
-            if self.check_for_run_away(person):
-                continue
-
-            person2 = None
-            while person2 == None:
-                try:
-                    person2 = people.pop(0)
-                except IndexError:
-                    break
-
-                if self.check_for_run_away(person2):
-                    person2 = None
-                    continue
-
-            if person2 != None:
-                self.matches.append((person, person2))
+        # Go through each person once (in order) and take out the ones that run away,
+        # then match each person that is left with the next one (an odd one out doesn't fight)
+        fighters = [person for person in people if not self.check_for_run_away(person)]
+        self.matches.extend(zip(fighters[0::2], fighters[1::2]))
 
     def check_for_run_away(self, person: Person):
         # if they said to run away, see if they have good chances
-        if person.get_day_choice(self.game_data['day']) == 'run':
+        if person.population.day_choice[person.index] == RUN:
             if self.run_away_chance(person):
                 person.add_motivation(10)
                 return True
@@ -116,8 +127,34 @@ class Day():
         Runs the matches
         """
 
+        if self.engine in ('numpy', 'approx', 'fast'):
+            return self.run_vector_matches()
+
+        for id, match in enumerate(self.matches):
+            fight = Fight(self.stats, match[0], match[1], game_data={**self.game_data, 'fight_num': id}, rng=self.rng)
+            self.games.append(fight)
+            fight.run()
+
+    def run_vector_matches(self):
+        """
+        Runs all the ai matches at once (the ones with a human still use a normal fight)
+
+        with the approx engine, the outcomes are sampled from the outcome table (see approx_fight.py)
+        """
+
+        ai_matches, ai_fight_nums = [], []
         for id, match in enumerate(self.matches):
-            fight = Fight(self.stats, match[0], match[1], game_data={**self.game_data, 'fight_num': id})
+            if match[0].ai and match[1].ai:
+                ai_matches.append(match)
+                ai_fight_nums.append(id)
+            else:
+                fight = Fight(self.stats, match[0], match[1], game_data={**self.game_data, 'fight_num': id}, rng=self.rng)
+                self.games.append(fight)
+                fight.run()
+
+        if len(ai_matches) > 0:
+            fight_class = ApproxFight if self.engine == 'approx' else VectorFight
+            fight = fight_class(self.stats, ai_matches, self.game_data, ai_fight_nums, make_numpy_rng(self.rng))
             self.games.append(fight)
             fight.run()
 
@@ -127,4 +164,4 @@ class Day():
         Returns if the person ran away or not
         """
 
-        return random.randint(0, 35) < person.speed
+        return self.rng.randint(0, 35) < person.speed
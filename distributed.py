@@ -0,0 +1,461 @@
+import argparse
+import collections
+import csv
+import multiprocessing
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+import traceback
+from multiprocessing.connection import Listener, Client, wait
+from checkpoint import last_iteration, trim_results
+from game import process_game_runner, save_line_iteration, DEFAULT_AUTHKEY
+from gui import GUI, QuietGUI
+from instrumentation import Instruments
+from stats import Stats
+from stats_writer import format_data
+
+"""
+The distributed backend runs the parallel lines on workers (on any machine that can reach the coordinator)
+
+The coordinator is the run started with `python game.py --backend distributed` - it hands out the lines,
+and shows and saves their results (the same data/ outputs as the other backends):
+    - a worker asks for a line when it is free (so faster workers take more of the lines)
+    - it runs the line with game_runner, and sends each iteration's summary (and checkpoints) back as soon as it is done
+    - while it is running, it sends a heartbeat every few seconds
+    - a worker that disconnects or stops sending anything is lost, and its line goes back to the front of the queue
+      (it carries on from the line's last checkpoint, and its results after the checkpoint are taken out so they all come from one run)
+    - when there are no lines left to hand out, free workers wait (in case a line comes back), until the run is done
+
+The workers connect with `python distributed.py ADDRESS`. The address is either HOST:PORT (tcp) or the path of a unix socket,
+and the messages are pickled, so only use an authkey you trust on networks you trust
+
+Messages from a worker: ('hello', name), ('ready',), ('heartbeat',), ('iteration', <the queue message of game_runner>), ('finished', parallel_id), ('failed', parallel_id, error)
+Messages to a worker: ('line', parallel_id, settings, checkpoint), ('wait', seconds), ('done',)
+"""
+
+# the seconds between a worker's heartbeats
+HEARTBEAT = 2
+
+# the seconds without hearing from a worker before it is lost
+HEARTBEAT_TIMEOUT = 15
+
+# the seconds a free worker waits before asking for a line again
+WAIT = 1
+
+
+def parse_address(address: str) -> tuple[str, int] | str:
+    """
+    Gets the address of a connection from HOST:PORT (tcp) or a path (unix socket)
+    """
+
+    host, _, port = address.rpartition(':')
+    if host and port.isdigit():
+        return host, int(port)
+
+    return address
+
+
+def format_address(address: tuple[str, int] | str) -> str:
+    if isinstance(address, tuple):
+        return f'{address[0]}:{address[1]}'
+
+    return address
+
+
+class ConnectionQueue():
+    """
+    Sends what game_runner puts on its queue (each iteration's summary) to the coordinator
+    """
+
+    def __init__(self, send):
+        self.send = send
+
+    def put(self, message: tuple):
+        self.send(('iteration', *message))
+
+
+class WorkerConnection():
+    """
+    The coordinator's side of a worker
+    """
+
+    def __init__(self, connection, address):
+        self.connection = connection
+        self.name = str(address)
+
+        self.line: int | None = None
+        """ The line the worker is running (None when it is free) """
+
+        self.last_seen = time.monotonic()
+        """ When the worker last sent anything """
+
+
+class Coordinator():
+    """
+    Hands out the lines to the workers, and adds their results to the stats (see above)
+    """
+
+    def __init__(self, address: tuple[str, int] | str, authkey: bytes, stats: Stats, settings: dict, checkpoints: dict[int, dict] = {}, gui: GUI = None, data_dir='./data', instruments: dict[int, Instruments] = None, heartbeat_timeout: float = HEARTBEAT_TIMEOUT):
+        self.stats = stats
+        self.settings = settings
+        self.gui = gui
+        self.data_dir = data_dir
+        self.instruments = instruments
+        self.heartbeat_timeout = heartbeat_timeout
+
+        self.listener = Listener(address, authkey=authkey)
+        self.address = self.listener.address
+        """ The address the workers connect to (with the real port if it was 0) """
+
+        self.checkpoints = dict(checkpoints)
+        """ The last checkpoint of each line (where it carries on from if its worker is lost) """
+
+        self.saved = {parallel_id: last_iteration(checkpoints, parallel_id) for parallel_id in range(settings['parallel_games'])}
+        """ The last iteration of each line that was saved """
+
+        self.pending = collections.deque(parallel_id for parallel_id, saved in self.saved.items() if saved < settings['iterations'])
+        """ The lines that are waiting for a worker """
+
+        self.finished = set(self.saved) - set(self.pending)
+
+        self.workers: list[WorkerConnection] = []
+        self.new_workers: list[WorkerConnection] = []
+        self.lock = threading.Lock()
+
+    def accept(self):
+        """
+        Accepts the workers (in its own thread, until the listener is closed)
+        """
+
+        while True:
+            try:
+                connection = self.listener.accept()
+            except (OSError, EOFError):
+                # the listener was closed (the run is done)
+                return
+            except Exception as e:
+                # eg. a connection with the wrong authkey
+                log(f'a worker could not connect: {e!r}')
+                continue
+
+            with self.lock:
+                self.new_workers.append(WorkerConnection(connection, self.listener.last_accepted))
+
+    def run(self):
+        """
+        Runs until every line is finished
+        """
+
+        threading.Thread(target=self.accept, daemon=True).start()
+
+        try:
+            while len(self.finished) < len(self.saved):
+                with self.lock:
+                    self.workers.extend(self.new_workers)
+                    self.new_workers.clear()
+
+                connections = {worker.connection: worker for worker in self.workers}
+                if not connections:
+                    time.sleep(0.2)
+
+                for connection in wait(list(connections), timeout=0.2):
+                    worker = connections[connection]
+                    try:
+                        message = connection.recv()
+                    except (EOFError, OSError):
+                        self.lose(worker, 'disconnected')
+                        continue
+
+                    worker.last_seen = time.monotonic()
+                    self.handle(worker, message)
+
+                # the workers that haven't been heard from (eg. their machine is down) are lost
+                now = time.monotonic()
+                for worker in list(self.workers):
+                    if now - worker.last_seen > self.heartbeat_timeout:
+                        self.lose(worker, f'no heartbeat for {self.heartbeat_timeout}s')
+
+        finally:
+            self.listener.close()
+
+            # tell the workers the run is done
+            for worker in self.workers + self.new_workers:
+                try:
+                    worker.connection.send(('done',))
+                except (OSError, ValueError):
+                    pass
+                worker.connection.close()
+
+    def handle(self, worker: WorkerConnection, message: tuple):
+        """
+        Handles a message from a worker
+        """
+
+        kind = message[0]
+
+        if kind == 'hello':
+            worker.name = message[1]
+
+        elif kind == 'ready':
+            if self.pending:
+                parallel_id = self.pending.popleft()
+                worker.line = parallel_id
+                self.send(worker, ('line', parallel_id, self.settings, self.checkpoints.get(parallel_id)))
+            elif len(self.finished) < len(self.saved):
+                self.send(worker, ('wait', WAIT))
+            else:
+                self.send(worker, ('done',))
+
+        elif kind == 'iteration':
+            parallel_id, iteration, average, best, checkpoint, summary = message[1:]
+            save_line_iteration(self.stats, self.gui, self.data_dir, parallel_id, iteration, average, best, checkpoint, summary, self.instruments)
+            self.saved[parallel_id] = iteration
+            if checkpoint:
+                self.checkpoints[parallel_id] = checkpoint
+
+        elif kind == 'finished':
+            self.finished.add(message[1])
+            worker.line = None
+
+        elif kind == 'failed':
+            raise RuntimeError(f'line {message[1]} failed on {worker.name}:\n{message[2]}')
+
+    def send(self, worker: WorkerConnection, message: tuple):
+        try:
+            worker.connection.send(message)
+        except (OSError, ValueError):
+            self.lose(worker, 'disconnected')
+
+    def lose(self, worker: WorkerConnection, reason: str):
+        """
+        Takes out a worker (its line goes back to the front of the queue)
+        """
+
+        if worker not in self.workers:
+            return
+
+        self.workers.remove(worker)
+        worker.connection.close()
+
+        if worker.line is not None and worker.line not in self.finished:
+            self.trim_line(worker.line)
+            self.pending.appendleft(worker.line)
+            log(f'lost {worker.name} ({reason}), line {worker.line} carries on from iteration {last_iteration(self.checkpoints, worker.line)}')
+        else:
+            log(f'lost {worker.name} ({reason})')
+
+    def trim_line(self, parallel_id: int):
+        """
+        Takes out the results of a line after its last checkpoint (the next worker makes them again)
+
+        the iterations after the checkpoint aren't always made the same way again (eg. the approx engine's tables aren't in the checkpoints),
+        so they are all taken out for the line's results to come from one run
+        """
+
+        checkpoint_iteration = last_iteration(self.checkpoints, parallel_id)
+        if self.saved[parallel_id] == checkpoint_iteration:
+            return
+
+        for iteration in range(checkpoint_iteration + 1, self.saved[parallel_id] + 1):
+            self.stats.average_data.pop((parallel_id, iteration), None)
+            self.stats.best_data.pop((parallel_id, iteration), None)
+
+        # the writer is closed while its files are trimmed (and opened again to add to them)
+        if self.stats.writer is not None:
+            locations = [os.path.join(self.data_dir, 'average_stats.csv'), os.path.join(self.data_dir, 'best_stats.csv')]
+            formats = self.settings.get('formats', ('csv',))
+
+            self.stats.writer.close()
+            trim_results(self.checkpoints, locations, formats, lines=[parallel_id])
+            self.stats.open_writer(*locations, append=True, formats=formats)
+
+        self.saved[parallel_id] = checkpoint_iteration
+
+
+def log(message: str):
+    # the dashboard is on stdout, so the coordinator's messages go to stderr
+    print(message, file=sys.stderr)
+
+
+def run_coordinator(address: str, authkey: str, stats: Stats, settings: dict, checkpoints: dict[int, dict] = {}, gui: GUI = None, data_dir='./data', instruments: dict[int, Instruments] = None, local_workers: int = 0, heartbeat_timeout: float = HEARTBEAT_TIMEOUT):
+    """
+    Runs the lines on the workers that connect to the address (and starts local_workers of them in processes on this machine)
+
+    the settings are the run's (see game.py), and the results are added to the stats like the process backend
+    """
+
+    coordinator = Coordinator(parse_address(address), authkey.encode(), stats, settings, checkpoints, gui, data_dir, instruments, heartbeat_timeout)
+    log(f'waiting for workers on {format_address(coordinator.address)}')
+
+    processes = [multiprocessing.Process(target=run_worker, args=(format_address(coordinator.address), authkey, f'local-{i}'), daemon=True) for i in range(local_workers)]
+    for process in processes:
+        process.start()
+
+    try:
+        coordinator.run()
+    finally:
+        for process in processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+
+
+def run_worker(address: str, authkey: str = DEFAULT_AUTHKEY, name: str = None, retry: float = 0):
+    """
+    Runs lines for a coordinator until its run is done
+
+    if retry is given, the worker keeps trying to connect for that many seconds (eg. if it is started before the coordinator)
+    """
+
+    if name is None:
+        name = f'{socket.gethostname()}-{os.getpid()}'
+
+    give_up = time.monotonic() + retry
+    while True:
+        try:
+            connection = Client(parse_address(address), authkey=authkey.encode())
+            break
+        except (ConnectionRefusedError, FileNotFoundError):
+            if time.monotonic() > give_up:
+                raise
+            time.sleep(WAIT)
+
+    # the heartbeats are sent from another thread, so sending needs a lock
+    lock = threading.Lock()
+    stopped = threading.Event()
+
+    def send(message: tuple):
+        with lock:
+            connection.send(message)
+
+    def heartbeat():
+        while not stopped.wait(HEARTBEAT):
+            try:
+                send(('heartbeat',))
+            except (OSError, ValueError):
+                return
+
+    threading.Thread(target=heartbeat, daemon=True).start()
+
+    try:
+        send(('hello', name))
+        while True:
+            send(('ready',))
+            message = connection.recv()
+
+            if message[0] == 'done':
+                return
+
+            if message[0] == 'wait':
+                time.sleep(message[1])
+                continue
+
+            _, parallel_id, settings, checkpoint = message
+            try:
+                process_game_runner(settings['iterations'], parallel_id, settings['parallel_games'], settings['players'], settings['save_unneeded_data'], ConnectionQueue(send), settings['engine'], False, checkpoint, settings['checkpoint_every'], settings['seed'], settings['instrument'], stat_closeness=settings['stat_closeness'], strategy=settings['strategy'], evaluate=settings['evaluate'], rng_per_day=settings['rng_per_day'])
+            except Exception:
+                send(('failed', parallel_id, traceback.format_exc()))
+                raise
+
+            send(('finished', parallel_id))
+
+    except (EOFError, ConnectionError):
+        # the coordinator is gone (the run was stopped, or it is done)
+        return
+
+    finally:
+        stopped.set()
+        connection.close()
+
+
+def check_lost_worker(kill_after: int, iterations: int = 12, checkpoint_every: int = 5, players: int = 1000):
+    """
+    Runs a line on a local worker, kills it once kill_after iterations are saved, and lets another worker finish the line
+
+    checks the saved rows come from one run - the first worker's up to its checkpoint, and the second one's after it
+    (the run has no seed, so a line that starts again without a checkpoint gets different random numbers)
+    """
+
+    settings = {'parallel_games': 1, 'iterations': iterations, 'players': players, 'save_unneeded_data': False, 'engine': 'python', 'formats': ('csv',), 'checkpoint_every': checkpoint_every, 'seed': None, 'instrument': False, 'stat_closeness': 'linear', 'strategy': 'best', 'evaluate': 0, 'rng_per_day': False}
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        stats = Stats(1)
+        stats.average_data = {}
+        stats.best_data = {}
+        stats.open_writer(os.path.join(data_dir, 'average_stats.csv'), os.path.join(data_dir, 'best_stats.csv'))
+
+        coordinator = Coordinator(('localhost', 0), DEFAULT_AUTHKEY.encode(), stats, settings, gui=QuietGUI(), data_dir=data_dir)
+        address = format_address(coordinator.address)
+
+        # the best row of each iteration that each worker sent
+        sent = {'first': {}, 'second': {}}
+        handle = coordinator.handle
+
+        def record(worker, message):
+            if message[0] == 'iteration':
+                sent[worker.name][message[2]] = message[4]
+            handle(worker, message)
+
+        coordinator.handle = record
+
+        first = multiprocessing.Process(target=run_worker, args=(address, DEFAULT_AUTHKEY, 'first'), daemon=True)
+        second = multiprocessing.Process(target=run_worker, args=(address, DEFAULT_AUTHKEY, 'second'), daemon=True)
+        killed_at = {}
+
+        def kill_first():
+            while coordinator.saved[0] < kill_after:
+                time.sleep(0.01)
+
+            first.kill()
+            killed_at['saved'] = coordinator.saved[0]
+            killed_at['checkpoint'] = last_iteration(coordinator.checkpoints, 0)
+            second.start()
+
+        first.start()
+        threading.Thread(target=kill_first, daemon=True).start()
+        try:
+            coordinator.run()
+        finally:
+            stats.close()
+            for process in (first, second):
+                if process.pid is not None:
+                    process.join(timeout=5)
+
+        with open(os.path.join(data_dir, 'best_stats.csv'), encoding='utf-8', newline='') as f:
+            rows = list(csv.reader(f))[1:]
+
+    checkpoint = killed_at['checkpoint']
+    assert killed_at['saved'] > checkpoint, f'the first worker was killed at its checkpoint ({checkpoint}), so nothing was trimmed'
+    assert [int(row[1]) for row in rows] == list(range(1, iterations + 1)), 'each iteration should be saved once'
+
+    for row in rows:
+        iteration = int(row[1])
+        worker = 'first' if iteration <= checkpoint else 'second'
+        assert row == [str(value) for value in format_data(sent[worker][iteration], 0, iteration)], f'iteration {iteration} is not from the {worker} worker'
+
+    print(f'killed the first worker after iteration {killed_at["saved"]} (its checkpoint was {checkpoint}), the rows come from one run')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Runs lines for a distributed run (see game.py --backend distributed)')
+    parser.add_argument('address', nargs='?', help='the address of the coordinator - HOST:PORT or the path of a unix socket')
+    parser.add_argument('--authkey', default=DEFAULT_AUTHKEY, help='the key the coordinator was started with')
+    parser.add_argument('--name', default=None, help='the name of the worker in the coordinator\'s messages (default: the host and pid)')
+    parser.add_argument('--retry', type=float, default=0, help='the seconds to keep trying to connect (default: %(default)s)')
+    parser.add_argument('--check', action='store_true', help='check a line is carried on properly when its worker is lost (on local workers, instead of running lines)')
+    args = parser.parse_args()
+
+    if args.check:
+        # before the first checkpoint (the line starts again), and after one (it carries on from it)
+        check_lost_worker(kill_after=2)
+        check_lost_worker(kill_after=7)
+        print('The lost lines are carried on properly')
+
+    elif args.address is None:
+        parser.error('the address is needed (or --check)')
+
+    else:
+        run_worker(args.address, args.authkey, args.name, args.retry)
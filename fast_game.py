@@ -0,0 +1,235 @@
+import argparse
+import random
+import time
+import numpy as np
+from person.population import ALIVE, FIGHT, RUN, FIXED_STATS
+from person.registry import registry
+from rng import make_numpy_rng
+from stats import Stats
+from vector_fight import VectorFight, PERSON1_WON, PERSON2_WON, PERSON1_RAN
+
+"""
+The fast game runs a whole game at once on the population's columns (the 'fast' engine)
+
+It has the same rules as a game of days and fights (see day.py and fight.py, which stay the reference),
+but it never makes the people, days, fights or fight records:
+    - every day's choices, health, run aways and matches are done for everyone at once
+    - the fights of a day are one vector fight, on buffers that are made once for the whole game
+    - the fights only go into the iteration's running summary, in one batch for each day (see FightSummary.add_batch)
+
+The random numbers are drawn in a different order, so a seeded game is not the same as with the other engines,
+it is only the same on average (see the check at the bottom)
+
+It can only be used when every player is an ai and the fights don't need to be kept or logged (see `FastGame.supports`)
+"""
+
+# the columns of a fight (see VectorFight.from_columns)
+fight_columns = ['health', 'motivation', 'motivation_penalty', 'speed', 'damage', 'protection']
+
+
+class FastGame():
+    """
+    Runs a game (see Game.main) in a tight loop over the population's columns
+    """
+
+    def __init__(self, game):
+        self.game = game
+        self.population = game.population
+
+        self.rng = make_numpy_rng(game.rng)
+        """ The numpy generator of the whole game (made from the game's) """
+
+        self.day = 1
+        """ The day the game is on """
+
+        # the buffers of the fights (there are never more than half the players fighting)
+        self.buffers = {column: np.empty((2, len(self.population) // 2), dtype=int if column in ('speed', 'damage', 'protection') else float) for column in fight_columns}
+
+    @staticmethod
+    def supports(game) -> bool:
+        """
+        If the fast game can run the game (only ai players, and the fights only go into the summary)
+        """
+
+        return game.stats.can_add_batches() and bool(np.all(game.population.as_numpy('ai')))
+
+    def run(self):
+        """
+        Runs the game until there is only one person alive
+        """
+
+        population = self.population
+        game = self.game
+        instruments = game.instruments
+        rng = self.rng
+
+        health = population.as_numpy('health')
+        motivation = population.as_numpy('motivation')
+        death_day = population.as_numpy('death_day')
+        day_choice = population.as_numpy('day_choice')
+        specie = population.as_numpy('specie')
+
+        # the stats don't change in a game (the effective ones are worked out in the population, see Population.set_stat)
+        raw = {stat_name: population.as_numpy(stat_name) for stat_name in FIXED_STATS}
+        effective = {stat_name: population.as_numpy('effective_' + stat_name) for stat_name in FIXED_STATS}
+        motivation_penalty = registry.get_penalty('motivation')[specie]
+
+        game_data = {'game': game.game_id, 'iteration': game.iteration}
+        alive = np.array(population.alive, dtype=int)
+        self.day = 1
+
+        while len(alive) > 1:
+            if instruments:
+                start = instruments.now()
+
+            # the choices (in a random order, which is also the order of the matches)
+            order = rng.permutation(alive)
+            choices = rng.integers(0, 2, len(order))
+            day_choice[order] = choices
+            population.choice_day = self.day
+
+            # at the start of the day, add health (the dead ones are never in alive)
+            health[order] = np.minimum(health[order] + 5, 150)
+
+            # the ones that run away get motivation, the ones that tried and couldn't lose it, and the fighters get it
+            running = choices == RUN
+            ran = running & (rng.integers(0, 36, len(order)) < raw['speed'][order])
+            motivation[order[ran]] = np.minimum(motivation[order[ran]] + 10, 100)
+            motivation[order[running & ~ran]] = np.maximum(motivation[order[running & ~ran]] - 5, 0)
+            motivation[order[choices == FIGHT]] = np.minimum(motivation[order[choices == FIGHT]] + 5, 100)
+
+            # match each fighter with the next one (an odd one out doesn't fight)
+            fighters = order[~ran]
+            matches = len(fighters) // 2
+            sides = fighters[:matches * 2].reshape(matches, 2).T
+
+            if instruments:
+                instruments.add_time('make_matches', start)
+                start = instruments.now()
+
+            turns = 0
+            if matches > 0:
+                turns = self.fight(sides, health, motivation, motivation_penalty, effective, raw, specie, game_data)
+                alive = alive[death_day[alive] == ALIVE]
+
+            if instruments:
+                instruments.add_time('fights', start)
+                instruments.count('days')
+                instruments.count('fights', matches)
+                instruments.count('turns', turns)
+
+            self.day += 1
+
+        # put the alive slots back on the population (as if they were killed one at a time)
+        population.alive = alive.tolist()
+        alive_position = population.as_numpy('alive_position')
+        alive_position[:] = ALIVE
+        alive_position[alive] = np.arange(len(alive))
+
+    def fight(self, sides: np.ndarray, health, motivation, motivation_penalty, effective, raw, specie, game_data) -> int:
+        """
+        Runs the fights of a day (sides has the slots of each side, a row for each), kills the losers and adds the fights to the summary
+
+        returns the amount of turns
+        """
+
+        matches = sides.shape[1]
+        columns = {column: buffer[:, :matches] for column, buffer in self.buffers.items()}
+        columns['health'][:] = health[sides]
+        columns['motivation'][:] = motivation[sides]
+        columns['motivation_penalty'][:] = motivation_penalty[sides]
+        for stat_name in FIXED_STATS:
+            columns[stat_name][:] = effective[stat_name][sides]
+
+        fight = VectorFight.from_columns(*[columns[column] for column in fight_columns], self.rng)
+        results = fight.simulate()
+
+        health[sides] = fight.health
+        motivation[sides] = fight.motivation
+
+        # the losers die (a fight that someone ran away from has no loser)
+        losers = np.concatenate([sides[1][results == PERSON1_WON], sides[0][results == PERSON2_WON]])
+        self.population.as_numpy('death_day')[losers] = self.day
+
+        # the winner (the one that ran away first for a run away) and the other one (only used for a run away)
+        first = (results == PERSON1_WON) | (results == PERSON1_RAN)
+        winners = np.where(first, sides[0], sides[1])
+        others = np.where(first, sides[1], sides[0])
+        ran = results >= PERSON1_RAN
+
+        def winner_value(values):
+            return np.where(ran, (values[winners] + values[others]) / 2, values[winners])
+
+        self.game.stats.add_fight_batch(
+            game_data,
+            specie[winners],
+            winner_value(raw['speed']),
+            winner_value(raw['damage']),
+            winner_value(raw['protection']),
+            winner_value(health),
+            fight.turns
+        )
+
+        return int(np.sum(fight.turns))
+
+
+def compare(games: int = 200, players: int = 100, seed: int = 0) -> list[list]:
+    """
+    Runs the same first generation games with the python engine and the fast one, and compares their results
+
+    returns a row for each result (the name, both averages, and how many standard errors apart they are)
+    """
+
+    from game import Game
+
+    results = {}
+    for engine in ('python', 'fast'):
+        rows = []
+        for game_id in range(games):
+            stats = Stats(1)
+            stats.average_data = {}
+            stats.best_data = {}
+
+            game = Game(0, 1, stats, 10, players, engine, random.Random(seed * games + game_id))
+            game.main()
+            summary = stats.summaries.summaries[(0, 1)]
+
+            rows.append([
+                summary.count,
+                int(np.max(game.population.as_numpy('death_day'))),
+                summary.turns / summary.count,
+                summary.winner_remaining_health / summary.count,
+                summary.best['winner_remaining_health'],
+                summary.speed / summary.count,
+            ])
+        results[engine] = np.array(rows, dtype=float)
+
+    names = ['fights', 'days', 'turns', 'winner_remaining_health', 'best_remaining_health', 'winner_speed']
+    table = []
+    for i, name in enumerate(names):
+        python, fast = results['python'][:, i], results['fast'][:, i]
+        error = np.sqrt(python.var(ddof=1) / len(python) + fast.var(ddof=1) / len(fast))
+        table.append([name, python.mean(), fast.mean(), abs(python.mean() - fast.mean()) / error if error else 0])
+
+    return table
+
+
+if __name__ == '__main__':
+    from tabulate import tabulate
+
+    parser = argparse.ArgumentParser(description='Checks the fast engine gets the same results as the python one (on average)')
+    parser.add_argument('-g', '--games', type=int, default=200, help='the games run with each engine (default: %(default)s)')
+    parser.add_argument('-p', '--players', type=int, default=100, help='the players in each game (default: %(default)s)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    table = compare(args.games, args.players, args.seed)
+    print(tabulate(table, headers=['result', 'python', 'fast', 'errors apart'], tablefmt="pipe", floatfmt=".3f"))
+    print(f'{time.perf_counter() - start:.2f}s')
+
+    # the averages should be within a few standard errors of each other
+    for name, python, fast, errors in table:
+        assert errors < 4, f'{name} is different: {python:.3f} (python) and {fast:.3f} (fast)'
+
+    print('The fast engine matches the python one')
@@ -24,22 +24,31 @@ Fights work like this (a turn based system):
 
 """
 
+# the choices in a turn
+choices = ['attack', 'defend', 'run']
+
 
 class Fight():
     """
     The fight class is responsible for running the fight between two people 
     """
 
-    def __init__(self, stats: Stats, person1: Person, person2: Person, game_data: dict[{'game': int, 'iteration': int, 'day': int, 'fight_num': int}]):
+    def __init__(self, stats: Stats, person1: Person, person2: Person, game_data: dict[{'game': int, 'iteration': int, 'day': int, 'fight_num': int}], rng: random.Random = random):
         self.person1 = person1
         self.person2 = person2
         self.game_data = game_data
         self.stats = stats
 
+        self.rng = rng
+        """ The random number generator of the game (the random module by default) """
+
         self.winner = None
         """ The winner of the fight - can be either None, (person1), (person2), or (person1, person2) """
         self.looser = None
 
+        self.turns = 0
+        """ The number of turns the fight took """
+
     def run(self):
         """
         Runs the fight
@@ -62,6 +71,8 @@ class Fight():
                 self.person1.add_motivation(2)
                 self.person2.add_motivation(2)
 
+        self.turns = turn_count
+
         # save the data
         if self.game_data:
             self.stats.add_fight(
@@ -77,27 +88,29 @@ class Fight():
         Gets the choice of a person
         """
 
-        choices = ['attack', 'defend', 'run']
-
         # use random if player is ai
         if person.ai:
-            return random.choice(choices)
+            return self.rng.choice(choices)
         else:
             return input(f'What do you want to do? {choices}: ')
 
-    def get_stats(self, person: Person, choice: str):
+    def get_damage(self, person: Person, choice: str) -> int:
         """
-        Gets the stats of a person with the defense or attack bonus
+        Gets the damage of a person with the attack bonus
         """
 
-        stats = person.get_stats()
-
         if choice == 'attack':
-            stats['damage'] += 5
-        elif choice == 'defend':
-            stats['protection'] += 5
+            return person.effective_damage + 5
+        return person.effective_damage
+
+    def get_protection(self, person: Person, choice: str) -> int:
+        """
+        Gets the protection of a person with the defense bonus
+        """
 
-        return stats
+        if choice == 'defend':
+            return person.effective_protection + 5
+        return person.effective_protection
 
     def run_away_chance(self, person: Person) -> bool:
         """
@@ -105,7 +118,7 @@ class Fight():
         """
 
         # Using speed as the chance, so higher speed = higher chance
-        return random.randint(0, 500) < person.get_stats()['speed']
+        return self.rng.randint(0, 500) < person.effective_speed
 
     def turn(self, player: Person, opponent: Person) -> int:
         """
@@ -130,14 +143,14 @@ class Fight():
             else:
                 player.remove_motivation(5)
 
-        # get the stats
-        stats = self.get_stats(player, choice)
+        # get the stats (the effective speed, damage and protection are only worked out when they are set, see Population.set_stat)
+        motivation = round(player.get_motivation())
 
         # get the damage
-        damage = random.randint(5, stats['damage']) * (stats['motivation'] / 50)
+        damage = self.rng.randint(5, self.get_damage(player, choice)) * (motivation / 50)
 
         # get the protection
-        protection = random.randint(5, stats['protection']) * (stats['motivation'] / 50) / 10
+        protection = self.rng.randint(5, self.get_protection(player, choice)) * (motivation / 50) / 10
 
         damage_dealt = abs(protection - damage)
 
@@ -146,7 +159,7 @@ class Fight():
 
         # check if the opponent is dead (if so, set the winner)
         if opponent.get_health() <= 0:
-            opponent.death_day = self.game_data['day']
+            opponent.die(self.game_data['day'])
             self.winner = player
             self.looser = opponent
 
@@ -0,0 +1,257 @@
+import csv
+import heapq
+import itertools
+import os
+import threading
+import numpy as np
+from person.registry import registry
+
+"""
+A fight sink gets every fight (as a record) as soon as it is done
+
+The record of a fight is small and doesn't keep the people (so they can be freed after the game):
+    {
+        'winner_stat': {'specie': 'Human', 'speed': 15, 'damage': 15, 'protection': 15},
+        'winner_remaining_health': 0.1,
+        'turns': 5,
+    }
+"""
+
+
+class FightSink():
+    """
+    The base of the fight sinks (does nothing with the fights)
+    """
+
+    def add_fight(self, game_data: dict[{'game': int, 'iteration': int, 'day': int, 'fight_num': int}], record: dict):
+        pass
+
+    def flush(self):
+        """
+        Writes anything that is waiting (so it is kept if the run stops)
+        """
+        pass
+
+    def close(self):
+        pass
+
+
+class FightSummary():
+    """
+    The running totals of the fights in one iteration of a game (so the fights themselves don't need to be kept)
+    """
+
+    def __init__(self, top_k: int = 1):
+        self.count = 0
+        self.speed = 0
+        self.damage = 0
+        self.protection = 0
+        self.winner_remaining_health = 0
+        self.turns = 0
+
+        self.specie = None
+        """ The specie of the first winner """
+
+        self.best = None
+        """ The record with the highest winner_remaining_health (if any was above 0) """
+
+        self.top_k = top_k
+        """ The amount of the best records that are kept (in `top`) """
+
+        self.top: list[tuple[float, int, dict]] = []
+        """ A heap of the best records (the lowest of them is first, so it can be replaced quickly) """
+
+        self.order = itertools.count()
+
+    def add(self, record: dict):
+        winner_stat = record['winner_stat']
+
+        self.count += 1
+        self.speed += winner_stat['speed']
+        self.damage += winner_stat['damage']
+        self.protection += winner_stat['protection']
+        self.winner_remaining_health += record['winner_remaining_health']
+        self.turns += record['turns']
+
+        if self.specie is None:
+            self.specie = winner_stat['specie']
+
+        self.consider(record)
+
+    def add_batch(self, specie: np.ndarray, speed: np.ndarray, damage: np.ndarray, protection: np.ndarray, winner_remaining_health: np.ndarray, turns: np.ndarray):
+        """
+        Adds many fights at once (each column has the winner's value for each fight, in the order they happened)
+
+        the specie is the id of the winner's specie (see person/registry.py)
+        """
+
+        if len(turns) == 0:
+            return
+
+        self.count += len(turns)
+        self.speed += float(np.sum(speed))
+        self.damage += float(np.sum(damage))
+        self.protection += float(np.sum(protection))
+        self.winner_remaining_health += float(np.sum(winner_remaining_health))
+        self.turns += int(np.sum(turns))
+
+        if self.specie is None:
+            self.specie = registry.names[specie[0]]
+
+        # only the healthiest few can be the best (or in the top), so only they are made into records
+        healthiest = np.argsort(-winner_remaining_health, kind='stable')[:max(self.top_k, 1)]
+        for i in sorted(healthiest):
+            self.consider({
+                'winner_stat': {
+                    'damage': float(damage[i]),
+                    'protection': float(protection[i]),
+                    'speed': float(speed[i]),
+                    'specie': registry.names[specie[i]],
+                },
+                'winner_remaining_health': float(winner_remaining_health[i]),
+                'turns': int(turns[i]),
+            })
+
+    def consider(self, record: dict):
+        """
+        Keeps the record if it is the best (or in the top) so far
+        """
+
+        highest_remaining_health = self.best['winner_remaining_health'] if self.best else 0
+        if record['winner_remaining_health'] > highest_remaining_health:
+            self.best = record
+
+        # only keep the top_k best (the first one with the same health stays ahead, like `best`)
+        if self.top_k > 1 and record['winner_remaining_health'] > 0:
+            item = (record['winner_remaining_health'], -next(self.order), record)
+            if len(self.top) < self.top_k:
+                heapq.heappush(self.top, item)
+            elif item[:2] > self.top[0][:2]:
+                heapq.heapreplace(self.top, item)
+
+    def get_top(self) -> list[dict]:
+        """
+        Gets the best records (the best first)
+        """
+
+        if self.top_k <= 1:
+            return [self.best] if self.best else []
+
+        return [record for _, _, record in sorted(self.top, key=lambda item: item[:2], reverse=True)]
+
+    def average(self) -> dict:
+        """
+        Gets the average of all the fights (in the same format as Stats.average_data)
+        """
+
+        return {
+            'stats': {
+                'damage': self.damage / self.count,
+                'protection': self.protection / self.count,
+                'speed': self.speed / self.count,
+                'specie': self.specie,
+            },
+            'winner_remaining_health': self.winner_remaining_health / self.count,
+            'turns': self.turns / self.count,
+        }
+
+
+class SummarySink(FightSink):
+    """
+    Keeps a running summary for each game and iteration
+    """
+
+    def __init__(self, top_k: int = 1):
+        self.summaries: dict[tuple[int, int], FightSummary] = {}
+
+        self.top_k = top_k
+        """ The amount of the best fights kept in each summary """
+
+    def add_fight(self, game_data, record):
+        key = (game_data['game'], game_data['iteration'])
+
+        summary = self.summaries.get(key)
+        if summary is None:
+            summary = self.summaries[key] = FightSummary(self.top_k)
+
+        summary.add(record)
+
+    def add_batch(self, game_data: dict[{'game': int, 'iteration': int}], *columns):
+        """
+        Adds many fights at once (see `FightSummary.add_batch`)
+        """
+
+        key = (game_data['game'], game_data['iteration'])
+
+        summary = self.summaries.get(key)
+        if summary is None:
+            summary = self.summaries[key] = FightSummary(self.top_k)
+
+        summary.add_batch(*columns)
+
+    def pop(self, game: int, iteration: int) -> FightSummary | None:
+        """
+        Gets (and forgets) the summary of an iteration
+        """
+
+        return self.summaries.pop((game, iteration), None)
+
+
+class CSVFightSink(FightSink):
+    """
+    Writes every fight as a row in a csv file (as they happen, so they are not kept in memory)
+    """
+
+    headings = [
+        'game',
+        'iteration',
+        'day',
+        'fight_num',
+        'specie',
+        'speed',
+        'damage',
+        'protection',
+        'winner_remaining_health',
+        'turns'
+    ]
+
+    def __init__(self, location='./data/fights.csv', append=False):
+        # make sure the folder exists
+        folder = os.path.dirname(location)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+
+        # if appending, the file already has its headings
+        self.file = open(location, 'a' if append else 'w', encoding='utf-8', newline='')
+        self.writer = csv.writer(self.file)
+        if not append:
+            self.writer.writerow(self.headings)
+
+        # the games in different threads share the file
+        self.lock = threading.Lock()
+
+    def add_fight(self, game_data, record):
+        winner_stat = record['winner_stat']
+        row = [
+            game_data['game'],
+            game_data['iteration'],
+            game_data['day'],
+            game_data['fight_num'],
+            winner_stat['specie'],
+            winner_stat['speed'],
+            winner_stat['damage'],
+            winner_stat['protection'],
+            record['winner_remaining_health'],
+            record['turns']
+        ]
+
+        with self.lock:
+            self.writer.writerow(row)
+
+    def flush(self):
+        with self.lock:
+            self.file.flush()
+
+    def close(self):
+        with self.lock:
+            self.file.close()
@@ -0,0 +1,112 @@
+import numpy as np
+from person.person import people as people_options
+from person.population import START_HEALTH, START_MOTIVATION
+from person.person import registry
+from random_person import make_random_stats_batch, choose_species_batch, stat_options
+from vector_fight import VectorFight
+
+"""
+The fitness evaluation re-fights the best stats of an iteration, so the next generation doesn't come from one lucky fight
+
+Each candidate (one of the iteration's top winners) fights random opponents in batches, and its fitness is
+the average health it has left after a fight (0 if it died). The batches are raced against each other:
+    - every candidate still in the race gets another batch of fights (all of them at once in one vector fight)
+    - a candidate is out when its fitness is clearly lower than the best one's (its upper bound is below the best's lower bound)
+    - the race ends when only one is left, or they have all had the most fights
+
+So clear winners and losers are decided after a few fights, and only the close ones get the most fights
+"""
+
+
+class FitnessEvaluator():
+    """
+    Ranks the winners of an iteration by their fitness (see above)
+    """
+
+    def __init__(self, candidates: int = 5, batch: int = 32, max_samples: int = 512, z: float = 2.0):
+        self.candidates = candidates
+        """ The amount of the top winners that are evaluated """
+
+        self.batch = batch
+        """ The fights each candidate gets in a round """
+
+        self.max_samples = max_samples
+        """ The most fights a candidate gets """
+
+        self.z = z
+        """ How many standard errors the bounds are from the average (higher = more fights before deciding) """
+
+    def evaluate(self, winners: list[dict], rng: np.random.Generator) -> list[dict]:
+        """
+        Gets the winners ranked by their fitness (the best first) - each gets its 'fitness' and the 'samples' it took
+        """
+
+        candidates = winners[:self.candidates]
+        if len(candidates) < 2:
+            return winners
+
+        totals = np.zeros(len(candidates))
+        squares = np.zeros(len(candidates))
+        samples = np.zeros(len(candidates), dtype=int)
+        racing = np.ones(len(candidates), dtype=bool)
+
+        while racing.sum() > 1 and samples[racing].max() < self.max_samples:
+            running = np.flatnonzero(racing)
+            health = self.fight(candidates, np.repeat(running, self.batch), rng).reshape(len(running), self.batch)
+
+            totals[running] += health.sum(axis=1)
+            squares[running] += (health ** 2).sum(axis=1)
+            samples[running] += self.batch
+
+            # take out the ones that are clearly worse than the best
+            means = totals[running] / samples[running]
+            errors = np.sqrt(np.maximum(squares[running] / samples[running] - means ** 2, 0) / samples[running])
+            lower, upper = means - self.z * errors, means + self.z * errors
+            racing[running[upper < lower.max()]] = False
+
+        fitness = totals / np.maximum(samples, 1)
+
+        # the ones still racing are ahead of the ones that were taken out
+        order = sorted(range(len(candidates)), key=lambda i: (racing[i], fitness[i]), reverse=True)
+        ranked = [{**candidates[i], 'fitness': float(fitness[i]), 'samples': int(samples[i])} for i in order]
+
+        return ranked + winners[self.candidates:]
+
+    def fight(self, candidates: list[dict], fighters: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        """
+        Runs a fight for each of the fighters (the index of a candidate) against a random opponent
+
+        returns the health each fighter has left (0 if they died)
+        """
+
+        amount = len(fighters)
+
+        # the opponents are made like a first generation (completely random)
+        opponent_stats = dict(zip(stat_options, make_random_stats_batch(amount, None, None, rng).T))
+        opponent_species = [people_options[i] for i in choose_species_batch(None, amount, rng)]
+        fighter_species = [registry.get(candidates[i]['stats']['specie']) for i in fighters]
+
+        # the side the candidate is on (the first side has the first turn)
+        side = rng.integers(0, 2, amount)
+
+        def columns(fighter_values, opponent_values):
+            fighter_values, opponent_values = np.asarray(fighter_values, dtype=float), np.asarray(opponent_values, dtype=float)
+            return np.stack([np.where(side == 0, fighter_values, opponent_values), np.where(side == 0, opponent_values, fighter_values)])
+
+        def effective(stat_name):
+            fighter_values = [max(candidates[i]['stats'][stat_name] * specie.penalties[stat_name], 5) for i, specie in zip(fighters, fighter_species)]
+            opponent_values = np.maximum(opponent_stats[stat_name] * np.array([specie.penalties[stat_name] for specie in opponent_species]), 5)
+            return np.round(columns(fighter_values, opponent_values))
+
+        fight = VectorFight.from_columns(
+            columns(np.full(amount, START_HEALTH), np.full(amount, START_HEALTH)),
+            columns(np.full(amount, START_MOTIVATION), np.full(amount, START_MOTIVATION)),
+            columns([specie.penalties['motivation'] for specie in fighter_species], [specie.penalties['motivation'] for specie in opponent_species]),
+            effective('speed'),
+            effective('damage'),
+            effective('protection'),
+            rng
+        )
+        fight.simulate()
+
+        return fight.health[side, np.arange(amount)]
@@ -1,58 +1,92 @@
+import argparse
 import asyncio
+import random
+import threading
 from day import Day
-from gui import GUI
+from fast_game import FastGame
+from gui import GUI, QuietGUI
 from person.BasePerson import BasePerson as Person
+from person.population import Population, ALIVE
 from stats import Stats
-from random_person import get_random_person
+from fight_sink import CSVFightSink
+from rng import make_rng, make_numpy_rng
+from checkpoint import make_checkpoint, save_checkpoint, load_checkpoints, clear_checkpoints, restore_random_state, last_iteration, trim_results
+from strategy import Strategy, make_strategy
+from fitness import FitnessEvaluator
+from instrumentation import Instruments, print_summaries
 import concurrent.futures
+import multiprocessing
+import queue as queue_module
 import json
+import os
+
+# the authkey of the distributed workers when one isn't given (see distributed.py, which imports this module)
+DEFAULT_AUTHKEY = 'hunger-games'
 
 
 class Game():
 
-    def __init__(self, game_id: int, iteration: int, stats: Stats, stat_closeness=10, players_amount=100):
+    def __init__(self, game_id: int, iteration: int, stats: Stats, stat_closeness=10, players_amount=100, engine='python', rng: random.Random = random, rng_per_day=False, instruments: Instruments = None, species: list[type[Person]] = None, strategy: Strategy = None):
         """
         The game class is responsible for spawning the days and one thread of the game
         """
         self.game_id = game_id
         self.iteration = iteration
         self.stats = stats
+        self.engine = engine
+
+        self.rng = rng
+        """ The random number generator of the game's line (the random module by default) """
+
+        self.rng_per_day = rng_per_day
+        """ If each day gets its own generator (made from the game's), so a day can be replayed on its own """
 
         self.stat_closeness = stat_closeness
 
-        self.players = self.choose_players(players_amount)
+        self.species = species
+        """ The species the players can be (all of them by default, see `choose_specie`) """
+
+        self.strategy = strategy if strategy is not None else Strategy()
+        """ How the players are made from the last iteration's winners (see strategy.py) """
+
+        self.instruments = instruments
+        """ The instruments of the game's line (None when it isn't instrumented) """
+
+        if instruments:
+            start = instruments.now()
+        self.population = self.choose_players(players_amount)
+        if instruments:
+            instruments.add_time('choose_players', start)
 
-    def choose_players(self, players_amount) -> list[Person]:
+    @property
+    def players(self) -> list[Person]:
+        """
+        The players of the game (made from the population when needed)
+        """
+        return self.population.people()
+
+    def choose_players(self, players_amount) -> Population:
         """
         Chooses the players for the game
         """
-        players = []
-        best_player_stats = None
+        population = Population(players_amount)
+        winners = []
 
-        # only try to get best stats if there is a previous iteration
+        # only try to get the winners if there is a previous iteration
         if self.iteration > 1:
-            best_player_stats = self.stats.best_data[(
-                self.game_id, self.iteration - 1)]['stats']
+            winners = self.stats.get_top(self.game_id, self.iteration - 1)
 
-        # make all the players
-        for i in range(players_amount):
-            player = get_random_person(
-                best_player_stats, self.stat_closeness, person_num=i+1)
-            players.append(player)
+        # make all the players (from the winners)
+        self.strategy.make_players(population, winners, self.stat_closeness, players_amount, make_numpy_rng(self.rng), self.species)
 
-        return players
+        return population
 
-    def get_alive_players(self) -> tuple[Person, Person]:
+    def get_alive_players(self) -> tuple[list[Person], list[Person]]:
         """
         Gets the alive and dead players
         """
-        alive_players = []
-        dead_players = []
-        for person in self.players:
-            if person.get_health() > 0:
-                alive_players.append(person)
-            else:
-                dead_players.append(person)
+        alive_players = self.population.alive_people()
+        dead_players = [self.population.person(index) for index in range(len(self.population)) if self.population.death_day[index] != ALIVE]
 
         return alive_players, dead_players
 
@@ -60,38 +94,171 @@ class Game():
         """
         Runs the game
         """
+        # the whole game can be run at once (see fast_game.py)
+        if self.engine == 'fast' and FastGame.supports(self):
+            FastGame(self).run()
+            return
+
         day_num = 1
-        alive_people, _ = self.get_alive_players()
 
-        # run while there is more than one person alive
-        while len(alive_people) > 1:
-            day = Day(self.stats, self.players, game_data={'game': self.game_id, 'day': day_num, 'iteration': self.iteration})
+        # run while there is more than one person alive (the alive slots are kept up to date by the fights)
+        while len(self.population.alive) > 1:
+            day_rng = random.Random(self.rng.getrandbits(64)) if self.rng_per_day else self.rng
+            day = Day(self.stats, self.population.alive_people(), game_data={'game': self.game_id, 'day': day_num, 'iteration': self.iteration}, engine=self.engine, rng=day_rng, instruments=self.instruments)
             day.run()
             day_num += 1
 
-            # make sure to update the alive people
-            alive_people, _ = self.get_alive_players()
 
+def game_runner(iterations: int, parallel_id: int, stats: Stats, players: int = 1000, save_unneeded_data=False, gui: GUI = None, queue=None, engine='python', checkpoint: dict = None, checkpoint_every: int = None, rng: random.Random = None, rng_per_day=False, instruments: Instruments = None, data_dir='./data', stat_closeness='linear', species: list[type[Person]] = None, strategy='best', evaluate=0, stop: threading.Event = None):
+    """
+    Runs all the iterations of one parallel line
+
+    if a queue is given (process backend), each iteration's summary is sent through it instead of being shown and saved here
+    if a checkpoint is given, the line carries on from the iteration after it
+    if a generator is given (see rng.py), all the line's random numbers come from it (otherwise from the random module)
+    if rng_per_day, each day gets its own generator (seeded from the line's), so a day can be replayed on its own
+    if instruments are given (see instrumentation.py), the time of each phase is added to them
+    the checkpoints are saved in the data_dir (the results go wherever the stats writer was opened)
+    the stat_closeness is the schedule of how close the players are to the last best (see `get_stat_closeness`)
+    the strategy is how each generation is made from the last one's winners (see strategy.py)
+    if evaluate is more than 0, that many of the top winners are ranked by their fitness before making the next generation (see fitness.py)
+    if a stop event is given (thread backend), the line makes a checkpoint and returns after the iteration it is on when it is set
+    """
+    if rng is None:
+        rng = random
+
+    strategy = make_strategy(strategy)
+    stats.track_top(strategy.get_top_k(stat_closeness))
+
+    evaluator = None
+    if evaluate:
+        evaluator = FitnessEvaluator(evaluate)
+        stats.track_top(evaluate)
+
+    start = 1
+    line_best = None
+    """ The best entry of the whole line so far (as [iteration, best_data entry]) """
+
+    if checkpoint:
+        start = checkpoint['iteration'] + 1
+        line_best = checkpoint['line_best']
+        stats.add_summary(parallel_id, checkpoint['iteration'], checkpoint['average_data'], checkpoint['best_data'], checkpoint.get('top_data'))
+        restore_random_state(checkpoint, rng)
+
+    stopping = False
 
-def game_runner(iterations: int, parallel_id: int, stats: Stats, players: int = 1000, save_unneeded_data=False, gui: GUI = None):
     # go through all the iterations (aka evolutions)
-    for iteration in range(1, iterations+1):
-        game = Game(parallel_id, iteration, stats, iterations - iteration, players)
+    for iteration in range(start, iterations+1):
+        # the run was stopped (the last iteration has its checkpoint)
+        if stopping:
+            return
+
+        if instruments:
+            instruments.start_iteration()
+
+        iteration_closeness = get_stat_closeness(stat_closeness, iteration, iterations)
+        game = Game(parallel_id, iteration, stats, iteration_closeness, players, engine, rng, rng_per_day, instruments, species, strategy)
         game.main()
+
+        if instruments:
+            phase_start = instruments.now()
         stats.simplify_data(parallel_id, iteration)
+        if instruments:
+            instruments.add_time('simplify_data', phase_start)
 
-        # print that game's best stat
-        if gui:
-            gui.update()
-        else:
-            print(str(game.game_id), str(iteration), game.stats.best_data[(parallel_id, iteration)]['stats'], '\n')
+        # rank the winners by their fitness (instead of their one fight)
+        if evaluator:
+            if instruments:
+                phase_start = instruments.now()
+
+            top = stats.get_top(parallel_id, iteration)
+            if top:
+                stats.top_data[(parallel_id, iteration)] = evaluator.evaluate(top, make_numpy_rng(rng))
+
+            if instruments:
+                instruments.add_time('fitness', phase_start)
 
         # remove the unneeded data (not needed for the next iteration)
         if not save_unneeded_data:
             stats.fights[parallel_id] = {}
+            stats.top_data.pop((parallel_id, iteration - 1), None)
+
+        entry = (parallel_id, iteration)
+        best = stats.best_data.get(entry)
+        if best and (line_best is None or best['winner_remaining_health'] > line_best[1]['winner_remaining_health']):
+            line_best = [iteration, best]
+
+        # make a checkpoint every so often (and at the end, or when the run is stopped)
+        stopping = stop is not None and stop.is_set()
+        new_checkpoint = None
+        if checkpoint_every and (iteration % checkpoint_every == 0 or iteration == iterations or stopping):
+            new_checkpoint = make_checkpoint(parallel_id, iteration, iterations, stats, line_best, rng, iteration_closeness)
+
+            # the fights before the checkpoint have to be logged before it is saved (it can be saved by another process)
+            stats.flush()
+
+        # send the summary to the main process (it does the showing and saving)
+        if queue is not None:
+            # the instruments go with the last iteration (the main process adds the time it takes to save)
+            summary = None
+            if instruments:
+                instruments.end_iteration()
+                if iteration == iterations:
+                    summary = instruments.summary()
+
+            queue.put((parallel_id, iteration, stats.average_data.get(entry), best, new_checkpoint, summary))
+            continue
+
+        show_progress(stats, gui, parallel_id, iteration)
 
         # save the data to csv
-        stats.save(entry=(parallel_id, iteration))
+        if instruments:
+            phase_start = instruments.now()
+        stats.save(entry=entry)
+
+        # the checkpoint is only saved once its results are written
+        if new_checkpoint:
+            stats.flush()
+            save_checkpoint(new_checkpoint, os.path.join(data_dir, 'checkpoints'))
+
+        if instruments:
+            instruments.add_time('save', phase_start)
+            instruments.end_iteration()
+
+
+def get_stat_closeness(schedule: str, iteration: int, iterations: int) -> int:
+    """
+    Gets the stat_closeness of an iteration from a schedule:
+        - 'linear': starts at the iterations and goes down by one each iteration (the default)
+        - 'linear:N': starts at N and goes down to 0 by the last iteration
+        - 'constant:N': always N
+        - 'adaptive': worked out from the winners by the strategy (see strategy.py)
+    """
+    name, _, value = schedule.partition(':')
+
+    if name == 'adaptive':
+        return None
+
+    if name == 'linear':
+        if not value:
+            return iterations - iteration
+        return round(int(value) * (iterations - iteration) / iterations)
+
+    elif name == 'constant':
+        return int(value)
+
+    raise ValueError(f'unknown stat_closeness schedule: {schedule}')
+
+
+def show_progress(stats: Stats, gui: GUI | None, parallel_id: int, iteration: int):
+    """
+    Shows the progress of a line (either on the gui or printed out)
+    """
+    # print that game's best stat
+    if gui:
+        gui.update(parallel_id, iteration)
+    else:
+        print(str(parallel_id), str(iteration), stats.best_data[(parallel_id, iteration)]['stats'], '\n')
 
 
 async def async_game(*inputs):
@@ -102,46 +269,317 @@ async def async_game(*inputs):
     result = await loop.run_in_executor(None, game_runner, *inputs)
 
 
-if __name__ == '__main__':
-    players = int(input("Players: "))
-    parallel_games = int(input("Parallel Games: "))
-    iterations = int(input("Games to run (in each parallel): "))
+def process_game_runner(iterations: int, parallel_id: int, parallel_games: int, players: int, save_unneeded_data: bool, queue, engine='python', log_fights=False, checkpoint: dict = None, checkpoint_every: int = None, seed: int = None, instrument=False, data_dir='./data', stat_closeness='linear', strategy='best', evaluate=0, rng_per_day=False):
+    """
+    Runs one parallel line in its own process (with its own Stats, Games, Days and Fights)
+    """
+    # each process logs its fights to its own file
+    sinks = [CSVFightSink(os.path.join(data_dir, f'fights_{parallel_id}.csv'), append=checkpoint is not None)] if log_fights else []
+
+    stats = Stats(parallel_games, keep_fights=save_unneeded_data, sinks=sinks)
+    game_runner(iterations, parallel_id, stats, players, save_unneeded_data, queue=queue, engine=engine, checkpoint=checkpoint, checkpoint_every=checkpoint_every, rng=make_rng(seed, parallel_id), rng_per_day=rng_per_day, instruments=Instruments() if instrument else None, data_dir=data_dir, stat_closeness=stat_closeness, strategy=strategy, evaluate=evaluate)
+    stats.close()
+
+
+def run_process_pool(iterations: int, parallel_games: int, stats: Stats, players: int, save_unneeded_data=False, gui: GUI = None, workers: int = None, engine='python', log_fights=False, checkpoints: dict[int, dict] = {}, checkpoint_every: int = None, seed: int = None, instruments: dict[int, Instruments] = None, data_dir='./data', stat_closeness='linear', strategy='best', evaluate=0, rng_per_day=False):
+    """
+    Runs the parallel lines in a pool of processes (so they are not fighting over the GIL)
+
+    The summaries of each iteration are streamed back and added to the main stats (which shows and saves them)
+    if instruments are given (for each line), the workers are instrumented and their summaries are added to them
+    """
+    with multiprocessing.Manager() as manager:
+        queue = manager.Queue()
+
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = []
+            for parallel_id in range(parallel_games):
+                futures.append(executor.submit(process_game_runner, iterations, parallel_id, parallel_games, players, save_unneeded_data, queue, engine, log_fights, checkpoints.get(parallel_id), checkpoint_every, seed, bool(instruments), data_dir, stat_closeness, strategy, evaluate, rng_per_day))
+
+            remaining = sum(iterations - last_iteration(checkpoints, parallel_id) for parallel_id in range(parallel_games))
+            while remaining > 0:
+                try:
+                    parallel_id, iteration, average, best, checkpoint, summary = queue.get(timeout=1)
+                except queue_module.Empty:
+                    # make sure none of the workers crashed (otherwise this would wait forever)
+                    for future in futures:
+                        if future.done() and future.exception():
+                            raise future.exception()
+                    continue
+
+                remaining -= 1
+                save_line_iteration(stats, gui, data_dir, parallel_id, iteration, average, best, checkpoint, summary, instruments)
+
+            # raise any errors from the workers
+            for future in futures:
+                future.result()
+
+
+def save_line_iteration(stats: Stats, gui: GUI | None, data_dir: str, parallel_id: int, iteration: int, average: dict, best: dict, checkpoint: dict = None, summary: dict = None, instruments: dict[int, Instruments] = None):
+    """
+    Adds the summary of an iteration that was run somewhere else (eg. in another process) to the main stats, and shows and saves it
+    """
+    line_instruments = instruments.get(parallel_id) if instruments else None
+    if line_instruments:
+        phase_start = line_instruments.now()
+
+    if best is not None:
+        stats.add_summary(parallel_id, iteration, average, best)
+        show_progress(stats, gui, parallel_id, iteration)
+        stats.save(entry=(parallel_id, iteration))
 
-    # Needed because if to many games at at time it can crash with the freeing up of resources
-    # save_unneeded_data = input("Save unneeded data? (y/N): ").lower() == 'y'
-    save_unneeded_data = False
+    # the checkpoint is only saved once its results are written
+    if checkpoint:
+        stats.flush()
+        save_checkpoint(checkpoint, os.path.join(data_dir, 'checkpoints'))
 
-    stats = Stats(parallel_games)
-    gui = GUI(stats)
+    if line_instruments:
+        line_instruments.add_time('save', phase_start)
+        if summary:
+            line_instruments.add_summary(summary)
+
+
+def load_metadata(data_dir='./data') -> dict:
+    """
+    Loads the settings of the last run in the data_dir (empty if there wasn't one)
+    """
+    location = os.path.join(data_dir, 'metadata.json')
+    if not os.path.exists(location):
+        return {}
+
+    with open(location) as f:
+        return json.load(f)
+
+
+def save_metadata(settings: dict, data_dir='./data', **extra):
+    """
+    Saves the settings of the run (and anything extra) to metadata.json in the data_dir
+    """
+    if not os.path.exists(data_dir):
+        os.makedirs(data_dir)
+
+    with open(os.path.join(data_dir, 'metadata.json'), 'w') as f:
+        json.dump({**settings, **extra}, f)
+
+
+def make_parser() -> argparse.ArgumentParser:
+    """
+    Makes the command line arguments of a run
+    """
+    parser = argparse.ArgumentParser(description='Runs the genetic algorithm (the results are saved in the data directory)')
+    parser.add_argument('-p', '--players', type=int, default=100, help='the players in each game (default: %(default)s)')
+    parser.add_argument('-l', '--parallel', type=int, default=1, help='the parallel lines of games (default: %(default)s)')
+    parser.add_argument('-i', '--iterations', type=int, default=100, help='the games to run in each line (default: %(default)s)')
+
+    # threads share one process (and the GIL), processes use all the cores
+    parser.add_argument('--backend', choices=['thread', 'process', 'distributed'], default='thread', help='how the lines are run in parallel (default: %(default)s)')
+    parser.add_argument('--workers', type=int, default=None, help='the processes of the process backend (default: the cores)')
+
+    # the distributed backend hands the lines out to workers (see distributed.py)
+    parser.add_argument('--address', default='localhost:6000', help='where the distributed workers connect to - HOST:PORT or a unix socket path (default: %(default)s)')
+    parser.add_argument('--authkey', default=DEFAULT_AUTHKEY, help='the key the distributed workers need to connect (default: %(default)s)')
+    parser.add_argument('--local-workers', type=int, default=0, help='the distributed workers to start on this machine (default: %(default)s)')
+
+    # numpy runs all of a day's fights at once (much faster with lots of players), and approx samples their outcomes from a table
+    parser.add_argument('--engine', choices=['python', 'numpy', 'approx', 'fast'], default='python', help='how the fights are run (default: %(default)s)')
+
+    # the columnar results are much faster to load for plotting (the csv files are kept as an export)
+    parser.add_argument('--format', choices=['csv', 'columnar', 'both'], default='csv', help='the format of the results (default: %(default)s)')
+
+    # how each generation is made from the last one's winners
+    parser.add_argument('--strategy', default='best', help='best, elite:K, tournament:K:N or crossover:K (default: %(default)s, see strategy.py)')
+    parser.add_argument('--evaluate', type=int, default=0, metavar='K', help='rank the top K winners of each iteration by re-fighting them (default: off, see fitness.py)')
+    parser.add_argument('--stat-closeness', default='linear', help='how close the players are to their parent - linear, linear:N, constant:N or adaptive (default: %(default)s)')
+
+    # the same seed (with the same settings) gives the same run
+    parser.add_argument('--seed', type=int, default=None, help='the seed of the run (default: random)')
+    parser.add_argument('--rng-per-day', action='store_true', help='give each day its own generator (split from its line\'s), so a day can be replayed on its own')
+
+    # separate runs can be packed on one machine by giving them their own data directories
+    parser.add_argument('-o', '--data-dir', default='./data', help='where the results, checkpoints and metadata are saved (default: %(default)s)')
+
+    parser.add_argument('--display', choices=['dashboard', 'print', 'quiet'], default='dashboard', help='how the progress is shown (default: %(default)s)')
+    parser.add_argument('-q', '--quiet', action='store_const', dest='display', const='quiet', help='show nothing until the run is done (same as --display quiet)')
+
+    parser.add_argument('--save-unneeded-data', action='store_true', help='keep every fight in memory (uses a lot more memory)')
+    parser.add_argument('--log-fights', action='store_true', help='write every fight to fights.csv in the data directory')
+    parser.add_argument('--checkpoint-every', type=int, default=10, help='the iterations between the checkpoints of each line (default: %(default)s)')
+    parser.add_argument('--instrument', action='store_true', help='time each part of the run (shown at the end and saved in the metadata)')
+    parser.add_argument('--resume', action='store_true', help='resume the last run in the data directory (with its settings) from its checkpoints')
+
+    return parser
+
+
+if __name__ == '__main__':
+    # the distributed backend runs the lines with this module (so it can only be imported here)
+    from distributed import run_coordinator
+
+    parser = make_parser()
+    args = parser.parse_args()
+    data_dir = args.data_dir
+
+    # see if the last run (in this data directory) was stopped before it finished
+    metadata = load_metadata(data_dir)
+    resume = args.resume
+    if resume and not metadata.get('in_progress', False):
+        parser.error(f'there is no stopped run to resume in {data_dir}')
+
+    if resume:
+        # use the same settings as the last run
+        players = metadata['players']
+        parallel_games = metadata['parallel_games']
+        iterations = metadata['iterations']
+        backend = metadata.get('backend', 'thread')
+        workers = metadata.get('workers')
+        address = metadata.get('address')
+        local_workers = metadata.get('local_workers')
+        engine = metadata.get('engine', 'python')
+        save_unneeded_data = metadata.get('save_unneeded_data', False)
+        log_fights = metadata.get('log_fights', False)
+        formats = tuple(metadata.get('formats', ['csv']))
+        checkpoint_every = metadata.get('checkpoint_every', 10)
+        seed = metadata.get('seed')
+        instrument = metadata.get('instrument', False)
+        strategy = metadata.get('strategy', 'best')
+        stat_closeness = metadata.get('stat_closeness', 'linear')
+        evaluate = metadata.get('evaluate', 0)
+        rng_per_day = metadata.get('rng_per_day', False)
+
+    else:
+        if metadata.get('in_progress', False):
+            print(f'The stopped run in {data_dir} is being replaced (use --resume to carry it on)')
+
+        players = args.players
+        parallel_games = args.parallel
+        iterations = args.iterations
+        backend = args.backend if parallel_games > 1 or args.backend == 'distributed' else 'thread'
+        workers = args.workers if backend == 'process' else None
+        address = args.address if backend == 'distributed' else None
+        local_workers = args.local_workers if backend == 'distributed' else None
+        engine = args.engine
+        save_unneeded_data = args.save_unneeded_data
+        log_fights = args.log_fights
+        formats = ('csv', 'columnar') if args.format == 'both' else (args.format,)
+        checkpoint_every = args.checkpoint_every
+        seed = args.seed
+        instrument = args.instrument
+        strategy = args.strategy
+        stat_closeness = args.stat_closeness
+        evaluate = args.evaluate
+        rng_per_day = args.rng_per_day
+
+        # the workers only send back their results (the fights would be logged on their machines)
+        if backend == 'distributed' and log_fights:
+            parser.error('--log-fights can not be used with the distributed backend')
+
+        # a line that is lost carries on from its checkpoint on another worker, so it needs the same random numbers there
+        if backend == 'distributed' and seed is None:
+            seed = random.randrange(2**32)
+
+        # check the strategy and schedule before starting
+        try:
+            make_strategy(strategy)
+            get_stat_closeness(stat_closeness, 1, iterations)
+        except ValueError as e:
+            parser.error(str(e))
+
+    settings = {
+        'parallel_games': parallel_games,
+        'iterations': iterations,
+        'players': players,
+        'backend': backend,
+        'workers': workers,
+        'address': address,
+        'local_workers': local_workers,
+        'engine': engine,
+        'save_unneeded_data': save_unneeded_data,
+        'log_fights': log_fights,
+        'formats': formats,
+        'checkpoint_every': checkpoint_every,
+        'seed': seed,
+        'instrument': instrument,
+        'strategy': strategy,
+        'stat_closeness': stat_closeness,
+        'evaluate': evaluate,
+        'rng_per_day': rng_per_day,
+    }
+
+    sinks = [CSVFightSink(os.path.join(data_dir, 'fights.csv'), append=resume)] if log_fights and backend != 'process' else []
+    stats = Stats(parallel_games, keep_fights=save_unneeded_data, sinks=sinks)
+
+    # the dashboard redraws a table, print shows a line for each iteration, and quiet shows nothing
+    gui = {'dashboard': GUI(stats), 'print': None, 'quiet': QuietGUI()}[args.display]
+
+    # each line has its own instruments (so they don't need a lock)
+    # the allocations are for the whole process, so they aren't recorded when the lines share it (the thread backend)
+    shared_process = backend == 'thread' and parallel_games > 1
+    instruments = {parallel_id: Instruments(allocations=not shared_process) for parallel_id in range(parallel_games)} if instrument else {}
 
     # save metadata
-    with open('data/metadata.json', 'w') as f:
-        metadata = {
-            'parallel_games': parallel_games,
-            'iterations': iterations,
-            'players': players,
-            'in_progress': True,
-        }
-        json.dump(metadata, f)
-
-    # reset the csv files
-    stats.save()
+    save_metadata(settings, data_dir, in_progress=True)
+
+    average_location = os.path.join(data_dir, 'average_stats.csv')
+    best_location = os.path.join(data_dir, 'best_stats.csv')
+    checkpoint_location = os.path.join(data_dir, 'checkpoints')
+
+    checkpoints = {}
+    if resume:
+        # take out the results after the checkpoints (they will be made again)
+        checkpoints = load_checkpoints(checkpoint_location)
+        trim_results(checkpoints, [average_location, best_location], formats)
+
+        # the fights after the checkpoints will be logged again too (fights_<line>.csv is the process backend's)
+        if log_fights:
+            fight_locations = [os.path.join(data_dir, 'fights.csv')] + [os.path.join(data_dir, f'fights_{parallel_id}.csv') for parallel_id in range(parallel_games)]
+            trim_results(checkpoints, fight_locations)
+
+        # the best of each line before the checkpoint still counts for the overall best
+        for parallel_id, checkpoint in checkpoints.items():
+            if checkpoint['line_best']:
+                line_best_iteration, line_best = checkpoint['line_best']
+                stats.add_summary(parallel_id, line_best_iteration, None, line_best)
+    else:
+        clear_checkpoints(checkpoint_location)
+
+    # reset the csv files, or add to them if resuming (and keep them open for the whole run)
+    stats.open_writer(average_location, best_location, formats=formats, append=resume)
 
     # run the games (either in parallel or not)
-    if parallel_games == 1:
-        game_runner(iterations, 0, stats, players, save_unneeded_data, gui)
+    try:
+        if backend == 'distributed':
+            run_coordinator(address, args.authkey, stats, settings, checkpoints, gui, data_dir, instruments, local_workers)
 
-    else:
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            # run the games in parallel
-            async def run_async_matches():
-                tasks = []
-                for parallel_id in range(parallel_games):
-                    tasks.append(asyncio.ensure_future(async_game(iterations, parallel_id, stats, players, save_unneeded_data, gui)))
+        elif parallel_games == 1:
+            game_runner(iterations, 0, stats, players, save_unneeded_data, gui, engine=engine, checkpoint=checkpoints.get(0), checkpoint_every=checkpoint_every, rng=make_rng(seed, 0), rng_per_day=rng_per_day, instruments=instruments.get(0), data_dir=data_dir, stat_closeness=stat_closeness, strategy=strategy, evaluate=evaluate)
 
-                await asyncio.gather(*tasks)
+        elif backend == 'process':
+            run_process_pool(iterations, parallel_games, stats, players, save_unneeded_data, gui, workers, engine, log_fights, checkpoints, checkpoint_every, seed, instruments, data_dir, stat_closeness, strategy, evaluate, rng_per_day)
 
-            asyncio.run(run_async_matches())
+        else:
+            with concurrent.futures.ThreadPoolExecutor() as executor:
+                # run the games in parallel
+                # Ctrl-C can't stop the threads, so they are told to checkpoint and return (and waited for)
+                stop = threading.Event()
+
+                async def run_async_matches():
+                    tasks = []
+                    for parallel_id in range(parallel_games):
+                        tasks.append(asyncio.ensure_future(async_game(iterations, parallel_id, stats, players, save_unneeded_data, gui, None, engine, checkpoints.get(parallel_id), checkpoint_every, make_rng(seed, parallel_id), rng_per_day, instruments.get(parallel_id), data_dir, stat_closeness, None, strategy, evaluate, stop)))
+
+                    try:
+                        await asyncio.gather(*tasks)
+                    except asyncio.CancelledError:
+                        # asyncio.run cancels this on Ctrl-C (and raises KeyboardInterrupt once the threads are done)
+                        stop.set()
+                        raise
+
+                asyncio.run(run_async_matches())
+
+    finally:
+        # write anything that is still waiting (even if stopped early)
+        stats.close()
+        if gui:
+            gui.stop()
 
     # save the best stats (and print them out)
     best_stat = stats.get_best_stat_overall()
@@ -151,15 +589,11 @@ if __name__ == '__main__':
  - Speed: {best_stat['speed']}
  - Specie: {best_stat['specie']}
 """)
-    stats.save()
+
+    # show where the time went
+    summaries = {parallel_id: line_instruments.summary() for parallel_id, line_instruments in instruments.items()}
+    if summaries:
+        print_summaries(summaries)
 
     # save metadata
-    with open('data/metadata.json', 'w') as f:
-        metadata = {
-            'parallel_games': parallel_games,
-            'iterations': iterations,
-            'players': players,
-            'best_stat': best_stat,
-            'in_progress': False,
-        }
-        json.dump(metadata, f)
+    save_metadata(settings, data_dir, best_stat=best_stat, in_progress=False, instrumentation=summaries or None)
@@ -1,36 +1,101 @@
+from collections import deque
+import queue
+import threading
 from stats import Stats
 from tabulate import tabulate
 
 
 class GUI():
-    def __init__(self, stats: Stats):
+    """
+    The dashboard shows the latest best stats of each parallel line
+
+    The lines only put their summaries on a queue (so they never wait for the console),
+    and the dashboard's own thread draws the table at a fixed refresh rate
+    """
+
+    def __init__(self, stats: Stats, refresh_rate: float = 0.5, rows_per_line: int = 5):
         self.stats = stats
 
-    in_progress = False
+        self.refresh_rate = refresh_rate
+        """ The seconds between each redraw """
 
-    def update(self):
-        # only run if not already running (to prevent weird console output)
-        # if self.in_progress:  return
+        self.rows_per_line = rows_per_line
+        """ The amount of iterations shown for each line (only the latest) """
 
-        # or wait until it is done
-        while self.in_progress: pass
-        self.in_progress = True
+        self.queue = queue.Queue()
+        """ The summaries that haven't been shown yet """
 
-        # get the data
-        average_data = self.stats.average_data.copy()  # the average for each game
-        best_data = self.stats.average_data.copy()  # the best for each game
+        self.rows: dict[int, deque] = {}
+        """ The latest rows of each line """
 
-        # sort best_data (by thread_num, then game_num)
-        best_data = sorted(best_data.items(), key=lambda x: (x[0][0], x[0][1]))
-        table = []
-        headers = ["Thread", "Game", "Specie", "Speed", "Damage", "Protection", "Remaining Health"]
+        self.thread = None
+        self.stopped = threading.Event()
 
+        self.lock = threading.Lock()
+        """ The lines update from their own threads, so only one of them can start (or stop) the drawing thread """
 
-        # Iterate over the best_data
-        for (thread_num, game_num), best_stats in best_data:
-            stats = best_stats.get('stats', {})
+    def update(self, thread_num: int, game_num: int):
+        """
+        Adds the summary of an iteration to be shown (doesn't wait for the console)
+        """
+
+        # start drawing on the first update
+        if self.thread is None:
+            self.start()
+
+        self.queue.put((thread_num, game_num, self.stats.best_data.get((thread_num, game_num))))
+
+    def start(self):
+        """
+        Starts the thread that draws the dashboard (if it isn't already started)
+        """
+
+        with self.lock:
+            if self.thread is not None:
+                return
+
+            self.stopped.clear()
+            self.thread = threading.Thread(target=self.run, daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        """
+        Stops the dashboard (after drawing anything that is left)
+        """
+
+        with self.lock:
+            if self.thread is None:
+                return
+
+            self.stopped.set()
+            self.thread.join()
+            self.thread = None
+
+    def run(self):
+        # redraw at the refresh rate (and once more when stopped)
+        while not self.stopped.wait(self.refresh_rate):
+            if self.read_queue():
+                self.draw()
+
+        if self.read_queue():
+            self.draw()
 
-            # Add a row to the table
+    def read_queue(self) -> bool:
+        """
+        Moves the waiting summaries to the rows (returns if there were any)
+        """
+
+        changed = False
+        while True:
+            try:
+                thread_num, game_num, best_stats = self.queue.get_nowait()
+            except queue.Empty:
+                return changed
+
+            if best_stats is None:
+                continue
+
+            stats = best_stats.get('stats', {})
             row = [
                 thread_num+1,
                 game_num,
@@ -40,13 +105,39 @@ class GUI():
                 stats.get('protection'),
                 best_stats.get('winner_remaining_health'),
             ]
-            table.append(row)
-        
+
+            if thread_num not in self.rows:
+                self.rows[thread_num] = deque(maxlen=self.rows_per_line)
+            self.rows[thread_num].append(row)
+            changed = True
+
+    def draw(self):
+        """
+        Draws the latest rows of each line
+        """
+
+        headers = ["Thread", "Game", "Specie", "Speed", "Damage", "Protection", "Remaining Health"]
+
+        # sort by thread_num (the rows of each line are already in order)
+        table = []
+        for thread_num in sorted(self.rows):
+            table.extend(self.rows[thread_num])
+
         # Print the table
         tbl = tabulate(table, headers=headers, tablefmt="pipe", floatfmt=".2f")
-        
+
         # Clear the console
         print("\033[H\033[J")
         print(tbl)
 
-        self.in_progress = False
+
+class QuietGUI():
+    """
+    Shows nothing (for runs in the background, where only the results are needed)
+    """
+
+    def update(self, thread_num: int, game_num: int):
+        pass
+
+    def stop(self):
+        pass
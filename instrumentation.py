@@ -0,0 +1,128 @@
+import gc
+import sys
+import time
+from tabulate import tabulate
+
+"""
+Instrumentation records where the time goes in a parallel line (it is off unless an Instruments is given)
+
+The Game, Day and game_runner check `if instruments:` before timing anything, so when it is off nothing is done
+    - times: the seconds spent in each phase (choose_players, make_matches, fights, simplify_data, fitness, save)
+    - counts: the iterations, days, fights and turns
+    - allocations: the net memory blocks allocated and the garbage collections in each iteration
+
+The allocations are counted for the whole process, so they are only recorded when the line has its process to itself
+(one line, or the process and distributed backends). With the thread backend they would have the other lines' in them, so they are left out
+"""
+
+# the phases that are timed (in the order they happen)
+phases = ['choose_players', 'make_matches', 'fights', 'simplify_data', 'fitness', 'save']
+
+
+class Instruments():
+    """
+    The counters and timers of one parallel line
+
+    allocations is if the allocations are recorded (only when the line is the only one running in its process, see above)
+    """
+
+    def __init__(self, allocations=True):
+        self.times = {phase: 0.0 for phase in phases}
+        self.counts = {'iterations': 0, 'days': 0, 'fights': 0, 'turns': 0}
+
+        self.allocations = allocations
+        self.allocated_blocks = 0
+        self.collections = 0
+
+        self.iteration_start = None
+
+    @staticmethod
+    def now() -> float:
+        return time.perf_counter()
+
+    def add_time(self, phase: str, start: float):
+        """
+        Adds the time since start (from `now`) to a phase
+        """
+
+        self.times[phase] += time.perf_counter() - start
+
+    def count(self, name: str, amount: int = 1):
+        self.counts[name] += amount
+
+    def start_iteration(self):
+        if self.allocations:
+            self.iteration_start = (sys.getallocatedblocks(), self.get_collections())
+
+    def end_iteration(self):
+        if self.allocations:
+            blocks, collections = self.iteration_start
+            self.allocated_blocks += sys.getallocatedblocks() - blocks
+            self.collections += self.get_collections() - collections
+        self.counts['iterations'] += 1
+
+    @staticmethod
+    def get_collections() -> int:
+        return sum(generation['collections'] for generation in gc.get_stats())
+
+    def summary(self) -> dict:
+        """
+        Gets the totals and averages (to be shown or saved as json)
+
+        the allocations are None when they weren't recorded
+        """
+
+        iterations = max(self.counts['iterations'], 1)
+        return {
+            'times': dict(self.times),
+            'total_time': sum(self.times.values()),
+            **self.counts,
+            'fights_per_day': self.counts['fights'] / max(self.counts['days'], 1),
+            'turns_per_fight': self.counts['turns'] / max(self.counts['fights'], 1),
+            'allocated_blocks': self.allocated_blocks if self.allocations else None,
+            'collections': self.collections if self.allocations else None,
+            'allocated_blocks_per_iteration': self.allocated_blocks / iterations if self.allocations else None,
+            'collections_per_iteration': self.collections / iterations if self.allocations else None,
+        }
+
+    def add_summary(self, summary: dict):
+        """
+        Adds the summary of another Instruments (eg. from a process worker) to these ones
+        """
+
+        for phase, seconds in summary['times'].items():
+            self.times[phase] += seconds
+
+        for name in self.counts:
+            self.counts[name] += summary[name]
+
+        if summary['allocated_blocks'] is None:
+            self.allocations = False
+        else:
+            self.allocated_blocks += summary['allocated_blocks']
+            self.collections += summary['collections']
+
+
+def print_summaries(summaries: dict[int, dict]):
+    """
+    Prints the summary of each line (the seconds in each phase, and the counts)
+
+    the allocations that weren't recorded are shown as -
+    """
+
+    headers = ['Thread', *phases, 'Days', 'Fights', 'Fights/Day', 'Turns/Fight', 'Blocks/Iteration', 'GCs/Iteration']
+    table = []
+    for parallel_id in sorted(summaries):
+        summary = summaries[parallel_id]
+        table.append([
+            parallel_id+1,
+            *[summary['times'][phase] for phase in phases],
+            summary['days'],
+            summary['fights'],
+            summary['fights_per_day'],
+            summary['turns_per_fight'],
+            summary['allocated_blocks_per_iteration'],
+            summary['collections_per_iteration'],
+        ])
+
+    print(tabulate(table, headers=headers, tablefmt="pipe", floatfmt=".2f", missingval="-"))
@@ -1,13 +1,17 @@
+from person.population import Population, ALIVE, DAY_CHOICES, FIGHT, RUN
+
+# the people made on their own (eg. a human player) share this population, so each one only takes a slot (it grows as needed)
+standalone = Population(16, growable=True)
+
 
 class BasePerson():
-    # The default stats for a person
-    health: float = 100
-    motivation: float = 50
+    """
+    A person is a view of a slot in a population (all the state is in the population's columns)
+
+    When made on its own (eg. for a human player), it gets a slot in the shared `standalone` population
+    """
 
-    # The min stats for a person (but customizable)
-    speed: float = 5
-    damage: float = 5
-    protection: float = 5
+    __slots__ = ('population', 'index')
 
     penalties = {
         'speed': 1,
@@ -17,11 +21,7 @@ class BasePerson():
         'motivation': 1
     }
 
-    death_day: int = None
-
-    name: str | None = None
-
-    def __init__(self, speed: float, damage: float, protection: float, ai=True):
+    def __init__(self, speed: float, damage: float, protection: float, ai=True, population: Population = None):
 
         # speed + damage + protection must be equal to 50 and their min is 5 each
         if speed + damage + protection != 50:
@@ -30,12 +30,110 @@ class BasePerson():
         if speed < 5 or damage < 5 or protection < 5:
             raise Exception('Speed, damage and protection must be at least 5')
 
-        self.speed = speed
-        self.damage = damage
-        self.protection = protection
-
-        self.ai = ai
+        if population is None:
+            population = standalone
+
+        self.population = population
+        self.index = population.add(self.__class__, speed, damage, protection, ai)
+
+    @classmethod
+    def view(cls, population: Population, index: int):
+        """
+        Makes the person for a slot that is already in the population
+        """
+
+        person = cls.__new__(cls)
+        person.population = population
+        person.index = index
+        return person
+
+    # the stats are stored in the population's columns
+    @property
+    def health(self) -> float:
+        return self.population.health[self.index]
+
+    @health.setter
+    def health(self, value: float):
+        self.population.health[self.index] = value
+
+    @property
+    def motivation(self) -> float:
+        return self.population.motivation[self.index]
+
+    @motivation.setter
+    def motivation(self, value: float):
+        self.population.motivation[self.index] = value
+
+    @property
+    def speed(self) -> float:
+        return self.population.speed[self.index]
+
+    @speed.setter
+    def speed(self, value: float):
+        self.population.set_stat(self.index, 'speed', value)
+
+    @property
+    def damage(self) -> float:
+        return self.population.damage[self.index]
+
+    @damage.setter
+    def damage(self, value: float):
+        self.population.set_stat(self.index, 'damage', value)
+
+    @property
+    def protection(self) -> float:
+        return self.population.protection[self.index]
+
+    @protection.setter
+    def protection(self, value: float):
+        self.population.set_stat(self.index, 'protection', value)
+
+    # the stats with the penalty, rounded and at least 5 (worked out when the stat is set, see Population.set_stat)
+    @property
+    def effective_speed(self) -> int:
+        return self.population.effective_speed[self.index]
+
+    @property
+    def effective_damage(self) -> int:
+        return self.population.effective_damage[self.index]
+
+    @property
+    def effective_protection(self) -> int:
+        return self.population.effective_protection[self.index]
+
+    @property
+    def death_day(self) -> int | None:
+        death_day = self.population.death_day[self.index]
+        return None if death_day == ALIVE else death_day
+
+    @death_day.setter
+    def death_day(self, value: int | None):
+        self.population.death_day[self.index] = ALIVE if value is None else value
+
+    @property
+    def specie(self) -> int:
+        """ The id of the person's specie (see person/registry.py) """
+        return self.population.specie[self.index]
+
+    @property
+    def ai(self) -> bool:
         """ Just changes wether to use input or random for the person's actions"""
+        return bool(self.population.ai[self.index])
+
+    @ai.setter
+    def ai(self, value: bool):
+        self.population.ai[self.index] = value
+
+    @property
+    def name(self) -> str:
+        name = self.population.names.get(self.index)
+        if name is None and self.ai:
+            return f'AI_{self.__class__.__name__}_{self.index + 1}'
+        return name
+
+    @name.setter
+    def name(self, value: str):
+        self.population.names[self.index] = value
 
     def __str__(self):
         return f"<Person: {self.name}>"
@@ -82,9 +180,9 @@ class BasePerson():
         return {
             'health': self.get_health(),
             'motivation': round(self.get_motivation()),
-            'speed': round(self.get_speed()),
-            'damage': round(self.get_damage()),
-            'protection': round(self.get_protection())
+            'speed': self.effective_speed,
+            'damage': self.effective_damage,
+            'protection': self.effective_protection
         }
 
     def remove_health(self, amount: float):
@@ -113,12 +211,17 @@ class BasePerson():
     def deal_damage(self, amount: float):
         self.remove_health(amount)
 
-    # the day choices are used for the player to choose what to do each day
-    # it is stored here to be accessed easily in the fight class
-    day_choices = {}
+    def die(self, day: int):
+        self.population.kill(self.index, day)
 
+    # the day choices are used for the player to choose what to do each day
+    # they are stored in the population (only for the current day) to be accessed easily in the day class
     def get_day_choice(self, day: int) -> str:
-        return self.day_choices[day]
+        if day != self.population.choice_day:
+            raise KeyError(day)
+
+        return DAY_CHOICES[self.population.day_choice[self.index]]
 
     def set_day_choice(self, day: int, choice: str):
-        self.day_choices[day] = choice
+        self.population.choice_day = day
+        self.population.day_choice[self.index] = RUN if choice == 'run' else FIGHT
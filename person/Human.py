@@ -3,6 +3,8 @@ from person.BasePerson import BasePerson as Person
 
 
 class Human(Person):
-    def __init__(self, speed, damage, protection):
-        super().__init__(speed, damage, protection)
+    __slots__ = ()
+
+    def __init__(self, speed, damage, protection, ai=True, population=None):
+        super().__init__(speed, damage, protection, ai, population)
 
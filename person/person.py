@@ -4,6 +4,7 @@ from person.Human import Human
 from person.HealthyButWeak import HealthyButWeak
 from person.MotivatedButWeak import MotivatedButWeak
 from person.SlowButStrong import SlowButStrong
+from person.registry import registry
 
 people: list[Person] = [
     Human,
@@ -11,3 +12,7 @@ people: list[Person] = [
     MotivatedButWeak,
     SlowButStrong   
 ]
+
+# the built in species are registered in the same order as people (so they get the same ids in every run)
+for specie in people:
+    registry.register(specie)
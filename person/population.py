@@ -0,0 +1,200 @@
+from array import array
+import numpy as np
+from person.registry import registry
+
+# the starting stats for a person
+START_HEALTH = 100
+START_MOTIVATION = 50
+
+# the death day of someone that is still alive
+ALIVE = -1
+
+# the choices at the start of a day (stored as their index)
+DAY_CHOICES = ['fight', 'run']
+FIGHT, RUN = 0, 1
+
+# the stats that don't change in a game (so their effective values are only worked out when they are set)
+FIXED_STATS = ['speed', 'damage', 'protection']
+
+
+def effective_stat(value: float, penalty: float) -> int:
+    """
+    Gets a stat with its specie's penalty, the way it is used in a fight (rounded and at least 5)
+    """
+
+    return round(max(value * penalty, 5))
+
+
+class Population():
+    """
+    The population holds the state of all the people in a game as columns (one slot for each person)
+
+    The people (BasePerson and its species) are just views of a slot, so they can be made when needed and thrown away.
+    The columns are arrays, so they can also be used as numpy arrays without copying (see `as_numpy`)
+    """
+
+    def __init__(self, size: int, growable=False):
+        self.size = size
+        """ The amount of slots (the columns are made once, so a game's population never needs to grow) """
+
+        self.growable = growable
+        """ If more slots are made when it is full (for the people made on their own, see BasePerson) """
+
+        self.count = 0
+        """ The amount of slots used """
+
+        # the stats (not including penalties)
+        self.speed = array('d', [0]) * size
+        self.damage = array('d', [0]) * size
+        self.protection = array('d', [0]) * size
+
+        # the stats with the penalties (kept up to date by `set_stat`, so a fight doesn't have to work them out)
+        self.effective_speed = array('i', [0]) * size
+        self.effective_damage = array('i', [0]) * size
+        self.effective_protection = array('i', [0]) * size
+
+        self.health = array('d', [START_HEALTH]) * size
+        self.motivation = array('d', [START_MOTIVATION]) * size
+
+        self.specie = array('B', [0]) * size
+        """ The id of each person's specie (see person/registry.py) """
+
+        self.death_day = array('i', [ALIVE]) * size
+        self.ai = array('b', [1]) * size
+
+        self.day_choice = array('b', [FIGHT]) * size
+        """ The choice each person made at the start of the current day (see `DAY_CHOICES`) """
+
+        self.choice_day: int | None = None
+        """ The day the choices are for (only the current day is kept) """
+
+        self.alive: list[int] = []
+        """ The slots of the people that are still alive (in no order) """
+
+        self.alive_position = array('i', [ALIVE]) * size
+        """ Where each slot is in `alive` (so it can be removed without searching) """
+
+        self.names: dict[int, str] = {}
+        """ The names that were set (others are made from the specie and slot) """
+
+    def __len__(self):
+        return self.count
+
+    def add(self, specie: type, speed: float, damage: float, protection: float, ai=True) -> int:
+        """
+        Adds a person to the next slot (returns the slot)
+        """
+
+        if self.count >= self.size:
+            if not self.growable:
+                raise Exception('Population is full')
+            self.grow()
+
+        index = self.count
+        self.count += 1
+
+        self.specie[index] = registry.get_id(specie)
+        self.set_stat(index, 'speed', speed)
+        self.set_stat(index, 'damage', damage)
+        self.set_stat(index, 'protection', protection)
+        self.ai[index] = ai
+
+        self.alive_position[index] = len(self.alive)
+        self.alive.append(index)
+
+        return index
+
+    def add_many(self, species: list[type], choices: np.ndarray, speed: np.ndarray, damage: np.ndarray, protection: np.ndarray, ai=True) -> range:
+        """
+        Adds many people at once (choices is the index of each person's specie in species)
+
+        returns the slots they were added to
+        """
+
+        amount = len(choices)
+        if self.count + amount > self.size:
+            raise Exception('Population is full')
+
+        start = self.count
+        self.count += amount
+
+        specie_ids = np.array([registry.get_id(specie) for specie in species])[choices]
+        self.as_numpy('specie')[start:] = specie_ids
+
+        for stat_name, values in zip(FIXED_STATS, [speed, damage, protection]):
+            penalties = registry.get_penalty(stat_name)[specie_ids]
+            self.as_numpy(stat_name)[start:] = values
+            self.as_numpy('effective_' + stat_name)[start:] = np.round(np.maximum(self.as_numpy(stat_name)[start:] * penalties, 5))
+        self.as_numpy('ai')[start:] = ai
+
+        self.as_numpy('alive_position')[start:] = np.arange(len(self.alive), len(self.alive) + amount)
+        self.alive.extend(range(start, self.count))
+
+        return range(start, self.count)
+
+    def grow(self):
+        """
+        Doubles the slots (the columns are copied to new arrays, so numpy views of the old ones are left as they were)
+        """
+
+        # the new slots start like the slots of a new population
+        new_slots = Population(self.size)
+        for name, column in vars(new_slots).items():
+            if isinstance(column, array):
+                setattr(self, name, getattr(self, name) + column)
+
+        self.size *= 2
+
+    def set_stat(self, index: int, stat_name: str, value: float):
+        """
+        Sets a stat that doesn't change in a game (speed, damage or protection) and its effective value
+        """
+
+        getattr(self, stat_name)[index] = value
+        getattr(self, 'effective_' + stat_name)[index] = effective_stat(value, registry.classes[self.specie[index]].penalties[stat_name])
+
+    def kill(self, index: int, day: int):
+        """
+        Marks a person as dead (and takes them out of the alive slots)
+        """
+
+        self.death_day[index] = day
+
+        position = self.alive_position[index]
+        if position == ALIVE:
+            return
+
+        # swap the last alive slot into this one's place, so nothing has to shift
+        last = self.alive.pop()
+        if last != index:
+            self.alive[position] = last
+            self.alive_position[last] = position
+        self.alive_position[index] = ALIVE
+
+    def person(self, index: int):
+        """
+        Gets the person (view) for a slot
+        """
+
+        return registry.classes[self.specie[index]].view(self, index)
+
+    def people(self) -> list:
+        """
+        Gets the people (views) for all the used slots
+        """
+
+        return [self.person(index) for index in range(self.count)]
+
+    def alive_people(self) -> list:
+        """
+        Gets the people (views) that are still alive
+        """
+
+        return [self.person(index) for index in self.alive]
+
+    def as_numpy(self, column: str) -> np.ndarray:
+        """
+        Gets a column as a numpy array (changing it also changes the population)
+        """
+
+        return np.frombuffer(getattr(self, column), dtype=getattr(self, column).typecode)[:self.count]
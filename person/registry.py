@@ -0,0 +1,85 @@
+import numpy as np
+
+# the penalties of a specie (in the order of the registry's penalty table)
+PENALTY_NAMES = ['speed', 'damage', 'protection', 'health', 'motivation']
+
+
+class SpecieRegistry():
+    """
+    The registry of the species (the classes of people) by their name and id
+
+    The id is the order a specie was registered in, so it can be stored instead of the name (eg. in the population's columns).
+    The built in species are registered in person.py, and any other specie is registered the first time it is used
+    """
+
+    def __init__(self):
+        self.classes: list[type] = []
+        """ The species (by their id) """
+
+        self.names: list[str] = []
+        """ The names of the species (by their id) """
+
+        self.ids: dict[str, int] = {}
+        """ The id of each specie's name """
+
+        self.penalties = np.empty((0, len(PENALTY_NAMES)))
+        """ The penalties of each specie (a row for each id, a column for each of `PENALTY_NAMES`) """
+
+    def __len__(self):
+        return len(self.classes)
+
+    def __contains__(self, name: str):
+        return name in self.ids
+
+    def register(self, specie: type) -> type:
+        """
+        Adds a specie to the registry (if it isn't already), returns the specie
+        """
+
+        name = specie.__name__
+        registered = self.ids.get(name)
+        if registered is not None:
+            if self.classes[registered] is not specie:
+                raise ValueError(f'there is already a specie called {name}')
+            return specie
+
+        self.ids[name] = len(self.classes)
+        self.classes.append(specie)
+        self.names.append(name)
+        self.penalties = np.vstack([self.penalties, [specie.penalties[penalty_name] for penalty_name in PENALTY_NAMES]])
+
+        return specie
+
+    def get(self, name: str) -> type:
+        """
+        Gets a specie from its name
+        """
+
+        specie_id = self.ids.get(name)
+        if specie_id is None:
+            raise ValueError(f'unknown specie: {name}')
+
+        return self.classes[specie_id]
+
+    def get_id(self, specie: type) -> int:
+        """
+        Gets the id of a specie (registering it if it isn't yet)
+        """
+
+        specie_id = self.ids.get(specie.__name__)
+        if specie_id is None or self.classes[specie_id] is not specie:
+            self.register(specie)
+            specie_id = self.ids[specie.__name__]
+
+        return specie_id
+
+    def get_penalty(self, penalty_name: str) -> np.ndarray:
+        """
+        Gets one of the penalties of every specie (by their id)
+        """
+
+        return self.penalties[:, PENALTY_NAMES.index(penalty_name)]
+
+
+registry = SpecieRegistry()
+""" The species used everywhere (see person.py) """
@@ -1,5 +1,6 @@
 # plots data/stats.csv to matplotlib
 
+import argparse
 from matplotlib.lines import Line2D
 from matplotlib.patches import Patch
 import matplotlib.pyplot as plt
@@ -7,40 +8,69 @@ import pandas as pd
 import numpy as np
 import json
 import os
+from columnar import load_columns
 
 
-def plot_stats():
-    # very similar to plot_stats, but it plots average stats and best stats on the same graph
+def load_results(location: str, formats: list[str] = None) -> dict[str, np.ndarray]:
+    """
+    Loads the results as columns (from the columnar folder or the csv file)
 
-    best_location = './data/best_stats.csv'
-    average_location = './data/average_stats.csv'
-    metadata_location = './data/metadata.json'
+    the formats are the ones the run saved (from its metadata) - the columnar folder is used if it was one of them,
+    and if they aren't known, whichever of the two was written last is used (an older run's folder can be left behind)
+    """
 
-    if not os.path.exists(best_location):
-        print(f'File {best_location} does not exist')
-        return
+    columnar_location = os.path.splitext(location)[0]
+    if formats is not None:
+        use_columnar = 'columnar' in formats
+    else:
+        use_columnar = os.path.exists(os.path.join(columnar_location, 'header.json')) and (
+            not os.path.exists(location) or get_modified(columnar_location) >= os.path.getmtime(location)
+        )
 
-    if not os.path.exists(average_location):
-        print(f'File {average_location} does not exist')
-        return
+    if use_columnar:
+        return load_columns(columnar_location)
+
+    df = pd.read_csv(location)
+    return {column: df[column].to_numpy() for column in df.columns}
+
+
+def get_modified(folder: str) -> float:
+    """
+    Gets when anything in a folder was last changed
+    """
+
+    return max(os.path.getmtime(os.path.join(folder, name)) for name in os.listdir(folder))
+
+
+def plot_stats(data_dir='./data', show=True):
+    # very similar to plot_stats, but it plots average stats and best stats on the same graph
+
+    best_location = os.path.join(data_dir, 'best_stats.csv')
+    average_location = os.path.join(data_dir, 'average_stats.csv')
+    metadata_location = os.path.join(data_dir, 'metadata.json')
+
+    for location in [best_location, average_location]:
+        if not os.path.exists(location) and not os.path.exists(os.path.splitext(location)[0]):
+            print(f'File {location} does not exist')
+            return
 
     if not os.path.exists(metadata_location):
         print(f'File {metadata_location} does not exist')
         return
 
-    best_df = pd.read_csv(best_location)
-    average_df = pd.read_csv(average_location)
     metadata = json.load(open(metadata_location))
+    best = load_results(best_location, metadata.get('formats'))
+    average = load_results(average_location, metadata.get('formats'))
 
     # plt.figure()
     # make the plot for the bar graph
     fig, ax = plt.subplots(figsize=(10, 6))
 
     # get the games
-    games = best_df['game'].unique()
+    games = np.unique(best['game'])
 
     # get the iterations
-    iterations = best_df['iteration'].unique()
+    iterations = np.unique(best['iteration'])
     num_iterations = len(iterations)
 
     # get the number of games
@@ -56,8 +86,7 @@ def plot_stats():
     # get the winner remaining health for each game and iteration
     best_y = []
     for game in games:
-        best_y.append(best_df[best_df['game'] == game]
-                      ['winner_remaining_health'])
+        best_y.append(best['winner_remaining_health'][best['game'] == game])
 
     # plot the bars for best stats
     for i in range(num_games):
@@ -67,8 +96,7 @@ def plot_stats():
     # get the average remaining health for each game and iteration
     average_y = []
     for game in games:
-        average_y.append(
-            average_df[average_df['game'] == game]['winner_remaining_health'])
+        average_y.append(average['winner_remaining_health'][average['game'] == game])
 
     # plot the bars for average stats
     for i in range(num_games):
@@ -96,9 +124,15 @@ def plot_stats():
     ax.legend(handles=legend_elements,)
 
     # save the figure
-    fig.savefig('./data/remaining_health.png')
-    plt.show()
+    fig.savefig(os.path.join(data_dir, 'remaining_health.png'))
+    if show:
+        plt.show()
 
 
 if __name__ == '__main__':
-    plot_stats()
+    parser = argparse.ArgumentParser(description='Plots the results of a run')
+    parser.add_argument('-o', '--data-dir', default='./data', help='the data directory of the run (default: %(default)s)')
+    parser.add_argument('--no-show', action='store_false', dest='show', help='only save the plot (for machines without a display)')
+    args = parser.parse_args()
+
+    plot_stats(args.data_dir, args.show)
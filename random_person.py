@@ -1,7 +1,12 @@
+import itertools
 import random
+from collections import Counter
+import numpy as np
 from day import Day
 from person.BasePerson import BasePerson as Person
 from person.person import people as people_options
+from person.population import Population
+from person.person import registry
 from stats import Stats, stat
 
 
@@ -37,7 +42,7 @@ def get_stat_range(best_stat: int | None, allowed_difference: int):
 # the stat options to choose from
 stat_options = ['speed', 'damage', 'protection']
 
-def make_random_stats(best_stat: stat = None, allowed_difference = 6):
+def make_random_stats(best_stat: stat = None, allowed_difference = 6, rng: random.Random = random):
     remaining_total = TOTAL_STAT_VALUE
 
     stats = {}
@@ -47,7 +52,7 @@ def make_random_stats(best_stat: stat = None, allowed_difference = 6):
 
     # shuffle the stat options
     shuffled_stat_options = stat_options.copy()
-    random.shuffle(shuffled_stat_options)
+    rng.shuffle(shuffled_stat_options)
 
     # go through all the stats and set them to a random value (between the range)
     for stat_name in shuffled_stat_options:
@@ -56,19 +61,19 @@ def make_random_stats(best_stat: stat = None, allowed_difference = 6):
         if min_range > max_range:
             stat = max_range
         else:
-            stat = random.randint(min_range, max_range)
-        stats[stat_name] = stat*50
-        remaining_total -= stat*50
+            stat = rng.randint(min_range, max_range)
+        stats[stat_name] = stat
+        remaining_total -= stat
 
     if remaining_total > 0:
         # Adjust one of the stats to reach the target total
-        stat_name = random.choice(stat_options)
+        stat_name = rng.choice(stat_options)
         stats[stat_name] += remaining_total
 
     elif remaining_total < 0:
         # Adjust existing stats to compensate for negative remaining total
         stat_names = stat_options.copy()
-        random.shuffle(stat_names)
+        rng.shuffle(stat_names)
 
         # because it is negative, we want to add to the stats to make it positive
         for stat_name in stat_names:
@@ -85,21 +90,102 @@ def make_random_stats(best_stat: stat = None, allowed_difference = 6):
     return stats
 
 
-def choose_specie(prev_specie) -> Person:
-    # 75% of same
-    random_num = random.randint(0, 100)
+def make_random_stats_batch(amount: int, best_stat: stat = None, allowed_difference = 6, rng: np.random.Generator = None) -> np.ndarray:
+    """
+    Makes the stats of a whole generation at once (the same steps as `make_random_stats`, but for every person together)
+
+    returns an array with a row for each person and a column for each stat (in the order of `stat_options`)
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+
+    # set each stat to a random value (between the range) - the range is the same for everyone
+    stats = np.empty((amount, len(stat_options)), dtype=int)
+    for column, stat_name in enumerate(stat_options):
+        min_range, max_range = get_stat_range(best_stat[stat_name] if best_stat else None, allowed_difference)
+        if min_range > max_range:
+            stats[:, column] = max_range
+        else:
+            stats[:, column] = rng.integers(min_range, max_range + 1, amount)
+
+    remaining_total = TOTAL_STAT_VALUE - stats.sum(axis=1)
+    rows = np.arange(amount)
+
+    # adjust one of the stats to reach the target total
+    under = remaining_total > 0
+    stats[rows[under], rng.integers(0, len(stat_options), amount)[under]] += remaining_total[under]
+
+    # take the extra away from the stats in a random order (each one can go down to the minimum)
+    extra = np.maximum(-remaining_total, 0)
+    order = np.argsort(rng.random((amount, len(stat_options))), axis=1)
+    for position in range(len(stat_options)):
+        column = order[:, position]
+        taken = np.minimum(extra, stats[rows, column] - MIN_STAT_VALUE)
+        stats[rows, column] -= taken
+        extra -= taken
+
+    return stats
+
+
+def choose_specie(prev_specie: str | None, rng: random.Random = random, species: list[type[Person]] = None) -> Person:
+    # the species to choose from (a specie can be in the list more than once to make it more likely)
+    if species is None:
+        species = people_options
+
+    # 75% of same (if it is one of the species to choose from)
+    random_num = rng.randint(0, 100)
     if random_num < 75 and prev_specie is not None:
-        for person in people_options:
-            if person.__class__.__name__ == prev_specie:
-                return person
-            
-    return random.choice(people_options)
+        person = registry.get(prev_specie)
+        if person in species:
+            return person
+
+    return rng.choice(species)
+
+
+def choose_species_batch(prev_specie: str | None, amount: int, rng: np.random.Generator = None, species: list[type[Person]] = None) -> np.ndarray:
+    """
+    Chooses the species of a whole generation at once (the same way as `choose_specie`)
 
+    returns the index of each person's specie in the species
+    """
+    if species is None:
+        species = people_options
+    if rng is None:
+        rng = np.random.default_rng()
+
+    # 75% of same
+    same = rng.integers(0, 101, amount) < 75
+    choices = rng.integers(0, len(species), amount)
+
+    if prev_specie is not None:
+        person = registry.get(prev_specie)
+        if person in species:
+            choices[same] = species.index(person)
+
+    return choices
+
+
+def get_random_people(prev_winner: stat | None, allowed_difference: int | None, amount: int, population: Population, rng: np.random.Generator = None, species: list[type[Person]] = None) -> range:
+    """
+    Adds a whole generation of random people to the population (returns their slots)
+    """
+    if species is None:
+        species = people_options
+
+    stats = make_random_stats_batch(amount, prev_winner, allowed_difference, rng)
+    choices = choose_species_batch(prev_winner and prev_winner.get("specie"), amount, rng, species)
 
-def get_random_person(prev_winner: stat | None, allowed_difference: int | None, person_num = 1) -> Person:
-    stats = make_random_stats(prev_winner, allowed_difference)
-    person = choose_specie(prev_winner and prev_winner.get("speed"))(**stats)
-    person.name = f'AI_{person.__class__.__name__}_{person_num}'
+    columns = dict(zip(stat_options, stats.T))
+    return population.add_many(species, choices, columns['speed'], columns['damage'], columns['protection'])
+
+
+def get_random_person(prev_winner: stat | None, allowed_difference: int | None, person_num = 1, population: Population = None, rng: random.Random = random, species: list[type[Person]] = None) -> Person:
+    stats = make_random_stats(prev_winner, allowed_difference, rng)
+    person = choose_specie(prev_winner and prev_winner.get("specie"), rng, species)(**stats, population=population)
+
+    # people in a population get their name from their slot
+    if population is None:
+        person.name = f'AI_{person.__class__.__name__}_{person_num}'
 
     return person
 
@@ -114,6 +200,52 @@ if __name__ == '__main__':
         # 'protection': 15,
     }
 
+    # test the batch for every best stat (and no best stat) and every allowed difference
+    print('testing batches...')
+    rng = np.random.default_rng(0)
+    best_stats = [None] + [
+        dict(zip(stat_options, values))
+        for values in itertools.product(range(MIN_STAT_VALUE, MAX_STAT_VALUE + 1), repeat=len(stat_options))
+        if sum(values) == TOTAL_STAT_VALUE
+    ]
+    for best in best_stats:
+        for allowed_difference in range(0, TOTAL_STAT_VALUE + 1):
+            stats = make_random_stats_batch(200, best, allowed_difference, rng)
+            assert stats.shape == (200, len(stat_options))
+            assert (stats.sum(axis=1) == TOTAL_STAT_VALUE).all()
+            assert (stats >= MIN_STAT_VALUE).all()
+
+    # the batch makes the same stats as make_random_stats (as often)
+    for best in best_stats[:3] + best_stats[-3:]:
+        batch = Counter(tuple(row) for row in make_random_stats_batch(5_000, best, 6, rng).tolist())
+        single = Counter(tuple(make_random_stats(best, 6).values()) for _ in range(5_000))
+        for values in batch | single:
+            assert abs(batch[values] - single[values]) / 5_000 < 0.05, (best, values, batch[values], single[values])
+
+    # the children are made around their parent (on average within the allowed difference, and a bit for the total)
+    for best in best_stats[1:]:
+        stats = make_random_stats_batch(2_000, best, 3, rng)
+        assert (np.abs(stats.mean(axis=0) - [best[stat_name] for stat_name in stat_options]) < 3 + 2).all(), best
+
+    choices = choose_species_batch(None, 10_000, rng)
+    assert choices.min() >= 0 and choices.max() < len(people_options)
+
+    # the last winner's specie is kept most of the time (and only if it can be chosen)
+    for specie in people_options:
+        kept = np.mean(np.array(people_options)[choose_species_batch(specie.__name__, 10_000, rng)] == specie)
+        single = np.mean([choose_specie(specie.__name__) == specie for _ in range(10_000)])
+        assert 0.75 < kept < 0.85 and 0.75 < single < 0.85, (specie, kept, single)
+    assert (choose_species_batch('Human', 1_000, rng, [people_options[3]]) == 0).all()
+
+    population = Population(10_000)
+    slots = get_random_people(best_stats[1], 6, 10_000, population, rng)
+    for person in population.people():
+        person_stats = person.get_stats(raw=True)
+        assert person_stats['speed'] + person_stats['damage'] + person_stats['protection'] == TOTAL_STAT_VALUE
+    assert list(slots) == population.alive == list(range(10_000))
+
+    print('batches done!')
+
     print('testing... (1_000_000 iterations)')
     for i in range(1_000_000*100):
         stat = make_random_stats(best_stat)
@@ -0,0 +1,33 @@
+import random
+import numpy as np
+
+"""
+The random number generators (rng) for a run
+
+Each parallel line gets its own generator (so the lines don't share one, and a seeded run can be replayed exactly):
+    - the line's generator is made from the run's seed and the line's id (see `make_rng`)
+    - it is passed to the Game, Day, Fight and random_person functions (they default to the random module)
+    - the numpy generator (for the vector fight) is made from it (see `make_numpy_rng`)
+"""
+
+
+def make_rng(seed: int | None, *stream) -> random.Random:
+    """
+    Makes the generator of a stream (eg. a parallel line) of a run
+
+    the same seed and stream always give the same numbers, and different streams are independent
+    if there is no seed, the generator is randomly seeded
+    """
+
+    if seed is None:
+        return random.Random()
+
+    return random.Random(':'.join(str(part) for part in (seed, *stream)))
+
+
+def make_numpy_rng(rng: random.Random) -> np.random.Generator:
+    """
+    Makes a numpy generator from a generator (for drawing lots of numbers at once)
+    """
+
+    return np.random.default_rng(rng.getrandbits(64))
@@ -2,6 +2,9 @@
 
 import csv
 from person.BasePerson import BasePerson
+from person.registry import registry
+from fight_sink import FightSink, SummarySink
+from stats_writer import StatsWriter, headings, format_data
 from statistics import mean
 import os
 import json
@@ -17,18 +20,18 @@ class Stats():
     It is then used to inform the next evolution
     """
 
-    fights: list[dict[tuple[int, int, int], dict[{'winner_stat': stat, 'winner_remaining_health': float, 'turns': int}]]] = []
+    fights: list[dict[int, dict[tuple[int, int], dict[{'winner_stat': stat, 'winner_remaining_health': float, 'turns': int}]]]] = []
     """"
+    The fights are put in a bucket for each iteration (so one iteration can be got without going through the rest)
     ```
     games = [
-        fights[(iteration, day, game_num)] = {
+        fights[iteration][(day, game_num)] = {
             'winner_stat': winner_stats {
                 'specie': 'human',
                 'speed': 15,
                 'damage': 15,
                 'protection': 15,
             },
-            'winner': <class>,
             'winner_remaining_health': 0.1,
             'turns': 5,
         }
@@ -36,9 +39,24 @@ class Stats():
     ```
     """
 
-    def __init__(self, games: int = 1):
+    def __init__(self, games: int = 1, keep_fights=False, sinks: list[FightSink] = None):
         self.fights = []
 
+        self.keep_fights = keep_fights
+        """ If every fight should be kept in `fights` (otherwise only the running summaries are kept) """
+
+        self.summaries = SummarySink()
+        """ The running summary of each game and iteration (used to simplify the data) """
+
+        self.top_data: dict[tuple[int, int], list[dict]] = {}
+        """ The best entries of each game and iteration (the best first, in the same format as best_data) - see `track_top` """
+
+        self.sinks: list[FightSink] = [self.summaries, *(sinks or [])]
+        """ Where every fight gets sent to when it is done """
+
+        self.writer: StatsWriter | None = None
+        """ The csv writer for the whole run (see `open_writer`) """
+
         # go through all the games and add a dict for each
         for i in range(games):
             self.fights.append({})
@@ -59,7 +77,7 @@ class Stats():
                 'damage': mean([winner1.damage, winner2.damage]),
                 'protection': mean([winner1.protection, winner2.protection]),
                 'speed': mean([winner1.speed, winner2.speed]),
-                'specie': winner1.__class__.__name__,
+                'specie': registry.names[winner1.specie],
             }
 
         else:
@@ -69,26 +87,53 @@ class Stats():
                 'damage': winner.damage,
                 'protection': winner.protection,
                 'speed': winner.speed,
-                'specie': winner.__class__.__name__,
+                'specie': registry.names[winner.specie],
             }
 
-        # save fight data (including winner's stats)
-        self.fights[game_data['game']][(game_data['iteration'], game_data['day'], game_data['fight_num'])] = {
+        # save fight data (including winner's stats, but not the people so they can be freed)
+        record = {
             'winner_stat': winner_stat,
-            'winner': winner,
-            'loser': loser,
             'winner_remaining_health': winner_health,
             'turns': turns,
         }
 
+        for sink in self.sinks:
+            sink.add_fight(game_data, record)
+
+        if self.keep_fights:
+            iteration_fights = self.fights[game_data['game']].setdefault(game_data['iteration'], {})
+            iteration_fights[(game_data['day'], game_data['fight_num'])] = record
+
+    def can_add_batches(self) -> bool:
+        """
+        if the fights can be added in batches (only when they don't need to be kept or sent anywhere else)
+        """
+
+        return not self.keep_fights and self.sinks == [self.summaries]
+
+    def add_fight_batch(self, game_data: dict[{'game': int, 'iteration': int}], specie, speed, damage, protection, winner_remaining_health, turns):
+        """
+        adds many fights at once to the running summary (each column has a value for each fight) - see `can_add_batches`
+        """
+
+        self.summaries.add_batch(game_data, specie, speed, damage, protection, winner_remaining_health, turns)
 
     def get_fights(self, game: int, iteration: int = None):
 
         # depending on if iteration is given, return all fights or just the ones for that iteration (but always for one game process)
         if iteration is not None:
-            return [v for k, v in self.fights[game].items() if k[1] == iteration]
+            return list(self.fights[game].get(iteration, {}).values())
         else:
-            return [v for k, v in self.fights[game].items()]
+            return [v for iteration_fights in self.fights[game].values() for v in iteration_fights.values()]
+
+    def open_writer(self, average_data_location='./data/average_stats.csv', best_data_location='./data/best_stats.csv', append=False, formats=('csv',)):
+        """
+        starts the results writer (so each saved entry is written in batches, not by opening the files every time)
+        if append, then the rows are added to the end of the files (otherwise the files are reset)
+        the formats can be 'csv' and/or 'columnar' (see columnar.py)
+        """
+
+        self.writer = StatsWriter(average_data_location, best_data_location, append=append, formats=formats)
 
     def save(self, entry: tuple[int, int] = False, average_data_location='./data/average_stats.csv', best_data_location='./data/best_stats.csv'):
         """
@@ -96,34 +141,21 @@ class Stats():
         if entry, then just add to bottom of file (not go through all data)
         """
 
+        # if only one entry to write (and the writer is open), let it write it in a batch
+        if entry and self.writer is not None:
+            average = self.average_data.get(entry)
+            best = self.best_data.get(entry)
+            self.writer.add(
+                format_data(average, entry[0], entry[1]) if average else None,
+                format_data(best, entry[0], entry[1]) if best else None
+            )
+            return
+
         # make sure data folder exists
-        if not os.path.exists('data'):
-            os.makedirs('data')
-
-        # the headings for the csv file
-        headings = [
-            'game',
-            'iteration',
-            'specie',
-            'speed',
-            'damage',
-            'protection',
-            'winner_remaining_health',
-            'turns'
-        ]
-
-        # format the data to be written to the csv file
-        def format_data(data: dict, game: int, iteration: int):
-            return [
-                game,
-                iteration,
-                data['stats']['specie'],
-                data['stats']['speed'],
-                data['stats']['damage'],
-                data['stats']['protection'],
-                data['winner_remaining_health'],
-                data['turns']
-            ]
+        for location in [average_data_location, best_data_location]:
+            folder = os.path.dirname(location)
+            if folder and not os.path.exists(folder):
+                os.makedirs(folder)
 
         # if only one entry to write
         if entry:
@@ -191,42 +223,85 @@ class Stats():
         # if interaction not specified, then print warning, and get all data
         if not iteration: print('iteration not specified')
 
-        fights = self.get_fights(game, iteration).copy()
+        # the summary was made as the fights happened (and isn't needed after this)
+        summary = self.summaries.pop(game, iteration)
 
-        # 
-        if len(fights) == 0:
+        if summary is None or summary.count == 0:
             print('no fights to simplify')
             return None
 
-        # get average of all stats
-        average_stats = {
-            'damage': mean([fight['winner_stat']['damage'] for fight in fights]),
-            'protection': mean([fight['winner_stat']['protection'] for fight in fights]),
-            'speed': mean([fight['winner_stat']['speed'] for fight in fights]),
-            'specie': fights[0]['winner_stat']['specie'],
-        }
-
         # add to average_data
-        self.average_data[(game, iteration)] = {
-            'stats': average_stats,
-            'winner_remaining_health': mean([fight['winner_remaining_health'] for fight in fights]),
-            'turns': mean([fight['turns'] for fight in fights]),
-        }
+        self.average_data[(game, iteration)] = summary.average()
 
         # get best stats
-        highest_remaining_health = 0
-        for fight in fights:
-            if fight == {}: continue
-
-            if fight['winner_remaining_health'] > highest_remaining_health:
-                highest_remaining_health = fight['winner_remaining_health']
-                best = fight.copy()
-                self.best_data[(game, iteration)] = {
-                    'stats': best['winner_stat'],
-                    'winner_remaining_health': best['winner_remaining_health'],
-                    'turns': best['turns'],
-                }
+        if summary.best is not None:
+            self.best_data[(game, iteration)] = {
+                'stats': summary.best['winner_stat'],
+                'winner_remaining_health': summary.best['winner_remaining_health'],
+                'turns': summary.best['turns'],
+            }
+
+        # get the top stats (if more than the best is tracked)
+        if summary.top_k > 1:
+            self.top_data[(game, iteration)] = [{
+                'stats': record['winner_stat'],
+                'winner_remaining_health': record['winner_remaining_health'],
+                'turns': record['turns'],
+            } for record in summary.get_top()]
+
+    def track_top(self, top_k: int):
+        """
+        makes sure at least the top_k best fights of each iteration are kept (in top_data)
+        """
+
+        self.summaries.top_k = max(self.summaries.top_k, top_k)
+
+    def get_top(self, game: int, iteration: int) -> list[dict]:
+        """
+        gets the best entries of an iteration (just the best one if no more were tracked)
+        """
+
+        if (game, iteration) in self.top_data:
+            return self.top_data[(game, iteration)]
+
+        best = self.best_data.get((game, iteration))
+        return [best] if best else []
+
+    def flush(self):
+        """
+        writes everything the results writer (and the fight sinks) have waiting
+        """
+
+        if self.writer is not None:
+            self.writer.flush()
+
+        for sink in self.sinks:
+            sink.flush()
+
+    def close(self):
+        """
+        closes all the fight sinks (and writes anything the csv writer still has)
+        """
+
+        for sink in self.sinks:
+            sink.close()
+
+        if self.writer is not None:
+            self.writer.close()
+
+    def add_summary(self, game: int, iteration: int, average: dict, best: dict, top: list[dict] = None):
+        """
+        adds an already simplified iteration (eg. from another process or a checkpoint) to average_data and best_data (and top_data)
+        """
+
+        if average is not None:
+            self.average_data[(game, iteration)] = average
+
+        if best is not None:
+            self.best_data[(game, iteration)] = best
 
+        if top is not None:
+            self.top_data[(game, iteration)] = top
 
     def get_best_stat_overall(self) -> stat:
         """
@@ -0,0 +1,135 @@
+import csv
+import os
+from columnar import ColumnarWriter
+import threading
+import time
+
+# the headings for the csv files
+headings = [
+    'game',
+    'iteration',
+    'specie',
+    'speed',
+    'damage',
+    'protection',
+    'winner_remaining_health',
+    'turns'
+]
+
+
+def format_data(data: dict, game: int, iteration: int) -> list:
+    """
+    formats an entry of average_data or best_data to be written to the csv file
+    """
+    return [
+        game,
+        iteration,
+        data['stats']['specie'],
+        data['stats']['speed'],
+        data['stats']['damage'],
+        data['stats']['protection'],
+        data['winner_remaining_health'],
+        data['turns']
+    ]
+
+
+class StatsWriter():
+    """
+    Keeps the average and best result files open for the whole run and writes the rows in batches
+
+    The rows are flushed when there are `max_rows` waiting, when `max_seconds` have passed since the last flush, and when closed.
+    All the parallel lines can share one writer (adding rows is behind a lock)
+
+    The formats can be 'csv' (the .csv files) and/or 'columnar' (a folder next to each csv file, see columnar.py)
+    """
+
+    def __init__(self, average_data_location='./data/average_stats.csv', best_data_location='./data/best_stats.csv', max_rows=100, max_seconds=5, append=False, formats=('csv',)):
+        self.max_rows = max_rows
+        self.max_seconds = max_seconds
+
+        # make sure the folders exist
+        for location in [average_data_location, best_data_location]:
+            folder = os.path.dirname(location)
+            if folder and not os.path.exists(folder):
+                os.makedirs(folder)
+
+        self.files = []
+        self.average_writers = []
+        self.best_writers = []
+
+        if 'csv' in formats:
+            # if appending, the files already have their headings
+            mode = 'a' if append else 'w'
+            for location, writers in [(average_data_location, self.average_writers), (best_data_location, self.best_writers)]:
+                file = open(location, mode, encoding='utf-8', newline='')
+                writer = csv.writer(file)
+                if not append:
+                    writer.writerow(headings)
+
+                self.files.append(file)
+                writers.append(writer.writerows)
+
+        if 'columnar' in formats:
+            for location, writers in [(average_data_location, self.average_writers), (best_data_location, self.best_writers)]:
+                columnar = ColumnarWriter(os.path.splitext(location)[0], append=append)
+
+                self.files.append(columnar)
+                writers.append(columnar.write)
+
+        self.average_rows = []
+        self.best_rows = []
+        self.last_flush = time.monotonic()
+        self.closed = False
+
+        self.lock = threading.Lock()
+
+    def add(self, average_row: list | None, best_row: list | None):
+        """
+        Adds the rows for an iteration (they get written on the next flush)
+        """
+
+        with self.lock:
+            if average_row is not None:
+                self.average_rows.append(average_row)
+            if best_row is not None:
+                self.best_rows.append(best_row)
+
+            waiting = max(len(self.average_rows), len(self.best_rows))
+            if waiting >= self.max_rows or time.monotonic() - self.last_flush >= self.max_seconds:
+                self._flush()
+
+    def flush(self):
+        """
+        Writes all the waiting rows to the files
+        """
+
+        with self.lock:
+            self._flush()
+
+    def _flush(self):
+        for write in self.average_writers:
+            write(self.average_rows)
+        for write in self.best_writers:
+            write(self.best_rows)
+
+        self.average_rows = []
+        self.best_rows = []
+
+        for file in self.files:
+            if hasattr(file, 'flush'):
+                file.flush()
+        self.last_flush = time.monotonic()
+
+    def close(self):
+        """
+        Writes the waiting rows and closes the files
+        """
+
+        with self.lock:
+            if self.closed:
+                return
+
+            self._flush()
+            for file in self.files:
+                file.close()
+            self.closed = True
@@ -0,0 +1,152 @@
+import numpy as np
+from person.BasePerson import BasePerson as Person
+from person.population import Population
+from random_person import get_random_people, stat_options
+
+"""
+A strategy decides how the next generation is made from the winners of the last one
+
+The winners are the best fights of the last iteration (see Stats.get_top), and each strategy picks a parent for every player.
+The players are then made around their parent's stats (within the radius, see random_person.get_random_people):
+    - 'best': every player comes from the best winner (the default)
+    - 'elite:K': the players are shared evenly between the top K winners
+    - 'tournament:K:N': each player's parent is the best of N random winners (out of the top K)
+    - 'crossover:K': each player's parent is a mix of two random winners (out of the top K), taking each stat from one of them
+
+The radius is the stat_closeness of the iteration (see game.get_stat_closeness), or if it is 'adaptive',
+it is worked out from how different the winners are (close winners = a small radius, different winners = a big one).
+The adaptive radius always uses at least ADAPTIVE_WINNERS of them (even if the strategy only makes players from the best one)
+"""
+
+# the amount of winners the adaptive radius is worked out from (at least)
+ADAPTIVE_WINNERS = 10
+
+
+class Strategy():
+    """
+    The base of the strategies (every player comes from the best winner)
+    """
+
+    def __init__(self, top_k: int = 1):
+        self.top_k = top_k
+        """ The amount of winners the strategy makes the players from """
+
+    def get_top_k(self, stat_closeness: str) -> int:
+        """
+        Gets the amount of winners needed from each iteration (more than top_k for the adaptive radius)
+        """
+
+        if stat_closeness == 'adaptive':
+            return max(self.top_k, ADAPTIVE_WINNERS)
+
+        return self.top_k
+
+    def get_radius(self, stat_closeness: int | None, winners: list[dict]) -> int | None:
+        """
+        Gets how far from their parent the players' stats can be (the stat_closeness is None for the adaptive radius)
+
+        the winners are all the ones that were tracked (see `get_top_k`), not just the top_k
+        """
+
+        if stat_closeness is not None:
+            return stat_closeness
+
+        # adaptive - twice the average spread of the winners' stats (at least 1)
+        if len(winners) < 2:
+            return 1
+
+        spread = np.mean([np.std([winner['stats'][stat_name] for winner in winners]) for stat_name in stat_options])
+        return max(1, round(2 * spread))
+
+    def get_parents(self, winners: list[dict], amount: int, rng: np.random.Generator) -> tuple[list[dict], np.ndarray]:
+        """
+        Gets the parents (as stats) and which one each player comes from
+        """
+
+        return [winners[0]['stats']], np.zeros(amount, dtype=int)
+
+    def make_players(self, population: Population, winners: list[dict], stat_closeness: int | None, amount: int, rng: np.random.Generator, species: list[type[Person]] = None):
+        """
+        Adds the next generation to the population (if there are no winners, the players are completely random)
+        """
+
+        if not winners:
+            get_random_people(None, stat_closeness, amount, population, rng, species)
+            return
+
+        radius = self.get_radius(stat_closeness, winners)
+        parents, choices = self.get_parents(winners[:self.top_k], amount, rng)
+
+        # make the players of each parent together
+        counts = np.bincount(choices, minlength=len(parents))
+        for parent, count in zip(parents, counts):
+            if count > 0:
+                get_random_people(parent, radius, int(count), population, rng, species)
+
+
+class EliteStrategy(Strategy):
+    """
+    The players are shared evenly between the top k winners
+    """
+
+    def get_parents(self, winners, amount, rng):
+        return [winner['stats'] for winner in winners], np.arange(amount) % len(winners)
+
+
+class TournamentStrategy(Strategy):
+    """
+    Each player's parent is the best of a few random winners
+    """
+
+    def __init__(self, top_k: int = 10, size: int = 3):
+        super().__init__(top_k)
+
+        self.size = size
+        """ The amount of winners in each tournament """
+
+    def get_parents(self, winners, amount, rng):
+        # the winners are sorted (the best first), so the best of a tournament is the lowest index
+        entrants = rng.integers(0, len(winners), (amount, self.size))
+        return [winner['stats'] for winner in winners], entrants.min(axis=1)
+
+
+class CrossoverStrategy(Strategy):
+    """
+    Each player's parent is a mix of two random winners (each stat is taken from one of them)
+    """
+
+    def get_parents(self, winners, amount, rng):
+        # a mix for each pair of winners (the same pair always makes the same mix in a generation)
+        pairs = rng.integers(0, len(winners), (amount, 2))
+        pair_ids, choices = np.unique(pairs[:, 0] * len(winners) + pairs[:, 1], return_inverse=True)
+
+        parents = []
+        for pair_id in pair_ids:
+            first, second = winners[pair_id // len(winners)]['stats'], winners[pair_id % len(winners)]['stats']
+            takes = rng.integers(0, 2, len(stat_options) + 1)
+
+            parent = {stat_name: (first if take == 0 else second)[stat_name] for stat_name, take in zip(stat_options, takes)}
+            parent['specie'] = (first if takes[-1] == 0 else second)['specie']
+            parents.append(parent)
+
+        return parents, choices.reshape(-1)
+
+
+strategies = {
+    'best': Strategy,
+    'elite': EliteStrategy,
+    'tournament': TournamentStrategy,
+    'crossover': CrossoverStrategy,
+}
+
+
+def make_strategy(spec: str = 'best') -> Strategy:
+    """
+    Makes a strategy from its name and settings (eg. 'tournament:10:3')
+    """
+
+    name, *settings = spec.split(':')
+    if name not in strategies:
+        raise ValueError(f'unknown strategy: {spec}')
+
+    return strategies[name](*[int(setting) for setting in settings])
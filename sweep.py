@@ -0,0 +1,258 @@
+import argparse
+import concurrent.futures
+import csv
+import hashlib
+import itertools
+import json
+import os
+import time
+from types import MappingProxyType
+from approx_fight import clear_default_tables
+from game import game_runner, save_metadata
+from gui import QuietGUI
+from person.person import registry
+from rng import make_rng
+from stats import Stats
+from tabulate import tabulate
+
+"""
+A sweep runs a grid of settings (each point is one line of games) and puts all the results in one table
+
+The grid is every combination of the settings, eg.
+    {
+        'players': [100, 500],
+        'iterations': [20],
+        'stat_closeness': ['linear', 'constant:5'],  # see game.get_stat_closeness
+        'strategy': ['best', 'tournament:10:3'],     # see strategy.py
+        'evaluate': [0, 5],                          # see fitness.py
+        'species': ['all', 'Human,SlowButStrong'],   # the species the players can be (a specie can be given more than once)
+        'engine': ['python'],
+        'seed': [0, 1, 2],
+    }
+
+The points are run in a pool of processes (the longest first, so a long one doesn't start last)
+Every finished point is added to the results store (<data_dir>/results.jsonl), so points that are already done are skipped
+Each point also keeps its own results (in <data_dir>/points/<key>/, the same as a run of game.py)
+"""
+
+# the settings of a point (and their defaults)
+defaults = {
+    'players': 100,
+    'iterations': 20,
+    'stat_closeness': 'linear',
+    'strategy': 'best',
+    'evaluate': 0,
+    'species': 'all',
+    'engine': 'python',
+    'seed': 0,
+}
+
+# the settings that were added after the first sweeps, and their value from before they were added
+# a point with a setting at that value gets the key it had before the setting was added (so it isn't run again)
+# every new setting goes here, and the values here never change (even if the defaults do)
+added_settings = MappingProxyType({
+    'strategy': 'best',
+    'evaluate': 0,
+})
+
+# the columns of the results table (after the settings)
+result_columns = ['best_remaining_health', 'best_specie', 'best_speed', 'best_damage', 'best_protection', 'final_average_remaining_health', 'final_average_turns', 'seconds']
+
+
+def make_points(grid: dict[str, list]) -> list[dict]:
+    """
+    Makes every combination of the grid (the settings not in the grid use their default)
+    """
+
+    for name in grid:
+        if name not in defaults:
+            raise ValueError(f'unknown sweep setting: {name}')
+
+    names = list(defaults)
+    values = [grid.get(name, [defaults[name]]) for name in names]
+    return [dict(zip(names, combination)) for combination in itertools.product(*values)]
+
+
+def get_key(point: dict) -> str:
+    """
+    Gets the key of a point (the same settings always give the same key)
+
+    the added settings are left out when they are at their old value (see `added_settings`)
+    """
+
+    settings = {name: value for name, value in point.items() if name not in added_settings or value != added_settings[name]}
+    return hashlib.sha1(json.dumps(settings, sort_keys=True).encode()).hexdigest()[:12]
+
+
+def get_cost(point: dict) -> int:
+    """
+    Guesses how long a point takes (the fights in a game go up with the players)
+    """
+
+    return point['players'] * point['iterations']
+
+
+def get_species(species: str) -> list | None:
+    """
+    Gets the species classes from a comma separated list of their names ('all' for all of them)
+    """
+
+    if species == 'all':
+        return None
+
+    return [registry.get(name) for name in species.split(',')]
+
+
+def run_point(point: dict, data_dir: str) -> dict:
+    """
+    Runs the line of games of one point, and gets its results
+    """
+
+    key = get_key(point)
+    point_dir = os.path.join(data_dir, 'points', key)
+
+    stats = Stats(1)
+
+    # the results (and outcome tables) of earlier points in the same process aren't needed
+    stats.average_data = {}
+    stats.best_data = {}
+    clear_default_tables()
+
+    stats.open_writer(os.path.join(point_dir, 'average_stats.csv'), os.path.join(point_dir, 'best_stats.csv'))
+    save_metadata({**point, 'parallel_games': 1}, point_dir, in_progress=True)
+
+    start = time.perf_counter()
+    try:
+        game_runner(point['iterations'], 0, stats, point['players'], gui=QuietGUI(), engine=point['engine'], rng=make_rng(point['seed'], 0), data_dir=point_dir, stat_closeness=point['stat_closeness'], species=get_species(point['species']), strategy=point['strategy'], evaluate=point['evaluate'])
+    finally:
+        stats.close()
+    seconds = time.perf_counter() - start
+
+    best = max(stats.best_data.values(), key=lambda entry: entry['winner_remaining_health'])
+    final_average = stats.average_data[(0, max(iteration for _, iteration in stats.average_data))]
+
+    save_metadata({**point, 'parallel_games': 1}, point_dir, best_stat=best['stats'], in_progress=False)
+
+    return {
+        'key': key,
+        'point': point,
+        'best_remaining_health': best['winner_remaining_health'],
+        'best_specie': best['stats']['specie'],
+        'best_speed': best['stats']['speed'],
+        'best_damage': best['stats']['damage'],
+        'best_protection': best['stats']['protection'],
+        'final_average_remaining_health': final_average['winner_remaining_health'],
+        'final_average_turns': final_average['turns'],
+        'seconds': seconds,
+    }
+
+
+def load_results(data_dir: str) -> dict[str, dict]:
+    """
+    Loads the results store (the finished points by their key)
+    """
+
+    location = os.path.join(data_dir, 'results.jsonl')
+    results = {}
+    if not os.path.exists(location):
+        return results
+
+    with open(location) as f:
+        for line in f:
+            # a line can be cut off if the sweep was stopped while writing it
+            try:
+                result = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            results[result['key']] = result
+
+    return results
+
+
+def run_sweep(grid: dict[str, list], data_dir='./data/sweep', workers: int = None, quiet=False) -> list[dict]:
+    """
+    Runs all the points of the grid that aren't in the results store yet, and gets the results of the whole grid
+    """
+
+    if not os.path.exists(data_dir):
+        os.makedirs(data_dir)
+
+    points = make_points(grid)
+    results = load_results(data_dir)
+
+    # skip the points that are already done (and the same point given twice)
+    todo = list({get_key(point): point for point in points if get_key(point) not in results}.values())
+
+    # the longest points go first (so the pool isn't left waiting on one long point at the end)
+    todo.sort(key=get_cost, reverse=True)
+
+    if not quiet:
+        print(f'{len(points)} points ({len(points) - len(todo)} already done)')
+
+    with open(os.path.join(data_dir, 'results.jsonl'), 'a') as store:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(run_point, point, data_dir) for point in todo]
+
+            for done, future in enumerate(concurrent.futures.as_completed(futures), 1):
+                result = future.result()
+                results[result['key']] = result
+
+                # only this process writes to the store (the workers just send their results back)
+                store.write(json.dumps(result) + '\n')
+                store.flush()
+
+                if not quiet:
+                    print(f"[{done}/{len(todo)}] {result['key']} {result['point']} {result['seconds']:.2f}s")
+
+    return [results[get_key(point)] for point in points]
+
+
+def save_table(results: list[dict], location: str):
+    """
+    Saves the results of the points as one csv table
+    """
+
+    with open(location, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['key', *defaults, *result_columns])
+        for result in results:
+            writer.writerow([result['key'], *[result['point'][name] for name in defaults], *[result[column] for column in result_columns]])
+
+
+def print_table(results: list[dict]):
+    table = [[result['key'], *[result['point'][name] for name in defaults], *[result[column] for column in result_columns]] for result in results]
+    print(tabulate(table, headers=['key', *defaults, *result_columns], tablefmt="pipe", floatfmt=".3f"))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Runs a grid of settings (each point is one line of games) and puts the results in one table')
+    parser.add_argument('--grid', help='a json file of the grid (the options below are added to it)')
+    parser.add_argument('-p', '--players', type=int, nargs='+', help=f"the players in each game (default: {defaults['players']})")
+    parser.add_argument('-i', '--iterations', type=int, nargs='+', help=f"the games in each line (default: {defaults['iterations']})")
+    parser.add_argument('--stat-closeness', nargs='+', help=f"the stat_closeness schedules - linear, linear:N, constant:N or adaptive (default: {defaults['stat_closeness']})")
+    parser.add_argument('--strategy', nargs='+', help=f"the strategies - best, elite:K, tournament:K:N or crossover:K (default: {defaults['strategy']})")
+    parser.add_argument('--evaluate', type=int, nargs='+', help=f"the top winners ranked by re-fighting them - 0 is off (default: {defaults['evaluate']})")
+    parser.add_argument('--species', nargs='+', help=f"the species mixes - all, or the names with commas, eg. Human,Human,SlowButStrong (default: {defaults['species']})")
+    parser.add_argument('--engine', choices=['python', 'numpy', 'approx', 'fast'], nargs='+', help=f"the fight engines (default: {defaults['engine']})")
+    parser.add_argument('--seed', type=int, nargs='+', help=f"the seeds of each point (default: {defaults['seed']})")
+    parser.add_argument('--workers', type=int, default=None, help='the processes to run the points in (default: the cores)')
+    parser.add_argument('-o', '--data-dir', default='./data/sweep', help='where the results store and the points are saved (default: %(default)s)')
+    parser.add_argument('-q', '--quiet', action='store_true', help='only show the table at the end')
+    args = parser.parse_args()
+
+    grid = {}
+    if args.grid:
+        with open(args.grid) as f:
+            grid = json.load(f)
+
+    for name in defaults:
+        if getattr(args, name) is not None:
+            grid[name] = getattr(args, name)
+
+    try:
+        results = run_sweep(grid, args.data_dir, args.workers, args.quiet)
+    except ValueError as e:
+        parser.error(str(e))
+
+    save_table(results, os.path.join(args.data_dir, 'results.csv'))
+    print_table(results)
@@ -0,0 +1,238 @@
+import numpy as np
+from person.BasePerson import BasePerson as Person
+from person.registry import registry
+from stats import Stats
+
+"""
+The vector fight runs all the fights of a day at the same time (using numpy)
+
+It uses the same rules as the Fight class (see fight.py), but every turn is done for all
+the fights that are still going at once, with the random numbers drawn in batches:
+    - each column (health, motivation, speed, damage, protection, penalties) is an array
+      with a row for each side (person1, person2) and a column for each fight
+    - person2 only gets their turn if the fight was not ended by person1's turn
+"""
+
+# the choices in a fight
+ATTACK, DEFEND, RUN = 0, 1, 2
+
+# the results of a fight
+GOING, PERSON1_WON, PERSON2_WON, PERSON1_RAN, PERSON2_RAN = 0, 1, 2, 3, 4
+
+# the generator used when a fight isn't given one
+default_rng = np.random.default_rng()
+
+
+class VectorFight():
+    """
+    The vector fight class is responsible for running many fights (between different people) at once
+    """
+
+    def __init__(self, stats: Stats, matches: list[tuple[Person, Person]], game_data: dict[{'game': int, 'iteration': int, 'day': int}], fight_nums: list[int] = None, rng: np.random.Generator = None):
+        self.matches = matches
+        self.game_data = game_data
+        self.stats = stats
+
+        self.rng = rng if rng is not None else default_rng
+        """ The numpy generator for the random numbers """
+
+        self.fight_nums = fight_nums if fight_nums is not None else list(range(len(matches)))
+        """ The fight number of each match (used when saving the fights) """
+
+        # the columns (row 0 is person1, row 1 is person2)
+        sides = [[match[0] for match in matches], [match[1] for match in matches]]
+        self.population = self.shared_population(sides)
+
+        if self.population is not None:
+            # everyone is in the same population, so just take the slots from its columns
+            self.indexes = np.array([[person.index for person in side] for side in sides], dtype=int).reshape(2, len(matches))
+            self.health = self.population.as_numpy('health')[self.indexes]
+            self.motivation = self.population.as_numpy('motivation')[self.indexes]
+        else:
+            self.health = np.array([[person.health for person in side] for side in sides], dtype=float)
+            self.motivation = np.array([[person.motivation for person in side] for side in sides], dtype=float)
+
+        if self.population is not None:
+            self.motivation_penalty = registry.get_penalty('motivation')[self.population.as_numpy('specie')[self.indexes]]
+        else:
+            self.motivation_penalty = np.array([[person.penalties['motivation'] for person in side] for side in sides], dtype=float)
+
+        # speed, damage and protection don't change in a fight, so they are only got once
+        self.speed = self.effective_stat(sides, 'speed')
+        self.damage = self.effective_stat(sides, 'damage')
+        self.protection = self.effective_stat(sides, 'protection')
+
+        self.results = np.full(len(matches), GOING)
+        self.turns = np.zeros(len(matches), dtype=int)
+
+    @classmethod
+    def from_columns(cls, health: np.ndarray, motivation: np.ndarray, motivation_penalty: np.ndarray, speed: np.ndarray, damage: np.ndarray, protection: np.ndarray, rng: np.random.Generator = None):
+        """
+        Makes the fights from the columns (each with a row for each side), without any people
+
+        these fights can only be simulated (there is no one to save them to)
+        """
+
+        fight = cls.__new__(cls)
+        fight.matches = []
+        fight.game_data = None
+        fight.stats = None
+        fight.rng = rng if rng is not None else default_rng
+        fight.fight_nums = []
+        fight.population = None
+
+        # the columns are used as they are if they are already arrays (so buffers can be reused)
+        fight.health = np.asarray(health, dtype=float)
+        fight.motivation = np.asarray(motivation, dtype=float)
+        fight.motivation_penalty = np.asarray(motivation_penalty, dtype=float)
+        fight.speed = np.asarray(speed, dtype=int)
+        fight.damage = np.asarray(damage, dtype=int)
+        fight.protection = np.asarray(protection, dtype=int)
+
+        fights = fight.health.shape[1]
+        fight.results = np.full(fights, GOING)
+        fight.turns = np.zeros(fights, dtype=int)
+        return fight
+
+    def shared_population(self, sides: list[list[Person]]):
+        """
+        Gets the population everyone is in (or None if they are not all in the same one)
+        """
+
+        populations = {id(person.population): person.population for side in sides for person in side}
+        if len(populations) == 1:
+            return populations.popitem()[1]
+
+        return None
+
+    def effective_stat(self, sides: list[list[Person]], stat_name: str) -> np.ndarray:
+        """
+        Gets a stat with the penalty (rounded and at least 5)
+        """
+
+        # they are already worked out in the population (see Population.set_stat)
+        if self.population is not None:
+            return self.population.as_numpy('effective_' + stat_name)[self.indexes].astype(int)
+
+        return np.array([[getattr(person, 'effective_' + stat_name) for person in side] for side in sides], dtype=int)
+
+    def run(self):
+        """
+        Runs all the fights (and saves them)
+        """
+
+        self.simulate()
+        self.save()
+        return self.results
+
+    def simulate(self):
+        """
+        Runs all the fights until they have all ended (without saving them)
+        """
+
+        active = np.arange(len(self.results))
+        while len(active) > 0:
+            self.turns[active] += 1
+            d1 = self.turn(active, 0)
+
+            # only the fights that are still going get person2's turn
+            d2 = np.zeros(len(active))
+            going = self.results[active] == GOING
+            d2[going] = self.turn(active[going], 1)
+
+            # add/remove motivation (depending on outcome of damage dealt)
+            motivation1, motivation2 = self.motivation
+            person1_more = active[d1 > d2]
+            person2_more = active[d2 > d1]
+            same = active[d1 == d2]
+
+            motivation1[person1_more] = np.minimum(motivation1[person1_more] + 5, 100)
+            motivation2[person1_more] = np.maximum(motivation2[person1_more] - 5, 0)
+            motivation2[person2_more] = np.minimum(motivation2[person2_more] + 5, 100)
+            motivation1[person2_more] = np.maximum(motivation1[person2_more] - 5, 0)
+            motivation1[same] = np.minimum(motivation1[same] + 2, 100)
+            motivation2[same] = np.minimum(motivation2[same] + 2, 100)
+
+            active = active[self.results[active] == GOING]
+
+        return self.results
+
+    def turn(self, active: np.ndarray, side: int) -> np.ndarray:
+        """
+        Runs a turn for one side of all the given fights
+
+        returns the damage done in each fight
+        """
+
+        opponent = 1 - side
+        damage_dealt = np.zeros(len(active))
+
+        # get the choices
+        choices = self.rng.integers(0, 3, len(active))
+
+        # if they want to run away
+        running = choices == RUN
+        ran = running & (self.rng.integers(0, 501, len(active)) < self.speed[side, active])
+        failed = active[running & ~ran]
+
+        motivation = self.motivation[side]
+        motivation[active[ran]] = np.minimum(motivation[active[ran]] + 10, 100)
+        motivation[failed] = np.maximum(motivation[failed] - 5, 0)
+        self.results[active[ran]] = PERSON1_RAN if side == 0 else PERSON2_RAN
+
+        # everyone else deals damage (with the attack or defend bonus)
+        fighting = ~ran
+        indexes = active[fighting]
+        choices = choices[fighting]
+
+        multiplier = np.round(np.maximum(motivation[indexes] * self.motivation_penalty[side, indexes], 5)) / 50
+        damage = self.rng.integers(5, self.damage[side, indexes] + 5 * (choices == ATTACK) + 1) * multiplier
+        protection = self.rng.integers(5, self.protection[side, indexes] + 5 * (choices == DEFEND) + 1) * multiplier / 10
+
+        dealt = np.abs(protection - damage)
+        damage_dealt[fighting] = dealt
+
+        # deal the damage
+        health = self.health[opponent]
+        health[indexes] = np.maximum(health[indexes] - dealt, 0)
+
+        # check if the opponent is dead (if so, set the winner)
+        dead = indexes[health[indexes] <= 0]
+        self.results[dead] = PERSON1_WON if side == 0 else PERSON2_WON
+
+        return damage_dealt
+
+    def save(self):
+        """
+        Puts the health and motivation back on the people and saves the fights
+        """
+
+        if self.population is not None:
+            self.population.as_numpy('health')[self.indexes] = self.health
+            self.population.as_numpy('motivation')[self.indexes] = self.motivation
+
+        for i, (person1, person2) in enumerate(self.matches):
+            if self.population is None:
+                person1.health, person2.health = float(self.health[0, i]), float(self.health[1, i])
+                person1.motivation, person2.motivation = float(self.motivation[0, i]), float(self.motivation[1, i])
+
+            result = self.results[i]
+            if result == PERSON1_WON:
+                winner, looser = person1, person2
+            elif result == PERSON2_WON:
+                winner, looser = person2, person1
+            elif result == PERSON1_RAN:
+                winner, looser = (person1, person2), None
+            else:
+                winner, looser = (person2, person1), None
+
+            if looser is not None:
+                looser.die(self.game_data['day'])
+
+            if self.game_data:
+                self.stats.add_fight(
+                    {**self.game_data, 'fight_num': self.fight_nums[i]},
+                    winner,
+                    looser,
+                    int(self.turns[i])
+                )